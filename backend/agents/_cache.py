@@ -0,0 +1,96 @@
+"""
+Cache of agent results keyed on the agent's inputs and system prompt: a small in-memory
+LRU in front of a persistent SQLite store
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+import orjson
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Most recently used results kept in process, so repeat requests skip SQLite entirely
+MEMORY_CACHE_SIZE = 256
+
+_memory = OrderedDict()  # key -> (created, value); only touched from the agents' event loop
+
+
+def make_key(namespace: str, prompt: str, arguments: dict) -> str:
+    """Build a stable cache key; the prompt is part of the key so prompt edits invalidate old entries"""
+    payload = orjson.dumps([namespace, prompt, arguments], option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(Config.AGENT_CACHE_PATH)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS agent_cache ('
+        'key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)'
+    )
+    return conn
+
+
+def _get(key: str):
+    with closing(_connect()) as conn:
+        row = conn.execute('SELECT value, created FROM agent_cache WHERE key = ?', (key,)).fetchone()
+    if row is None or time.time() - row[1] > Config.AGENT_CACHE_TTL:
+        return None
+    return row[1], orjson.loads(row[0])
+
+
+def _set(key: str, value) -> None:
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO agent_cache (key, value, created) VALUES (?, ?, ?)',
+            (key, orjson.dumps(value), time.time())
+        )
+
+
+def _remember(key: str, value, created: float) -> None:
+    _memory[key] = (created, value)
+    _memory.move_to_end(key)
+    if len(_memory) > MEMORY_CACHE_SIZE:
+        _memory.popitem(last=False)
+
+
+async def load(key: str):
+    """Return the cached result for a key, or None on a miss (or if caching is disabled)"""
+    if Config.AGENT_CACHE_TTL <= 0:
+        return None
+
+    entry = _memory.get(key)
+    if entry is not None:
+        if time.time() - entry[0] <= Config.AGENT_CACHE_TTL:
+            _memory.move_to_end(key)
+            return dict(entry[1])
+        del _memory[key]
+
+    try:
+        entry = await asyncio.to_thread(_get, key)
+    except Exception as e:
+        logger.warning(f"Agent cache read failed: {e}")
+        return None
+    if entry is None:
+        return None
+    created, value = entry
+    _remember(key, dict(value), created)
+    return value
+
+
+async def store(key: str, value) -> None:
+    """Cache a successful result; cache failures never affect the caller"""
+    if Config.AGENT_CACHE_TTL <= 0:
+        return
+    _remember(key, dict(value), time.time())
+    try:
+        await asyncio.to_thread(_set, key, value)
+    except Exception as e:
+        logger.warning(f"Agent cache write failed: {e}")
@@ -0,0 +1,62 @@
+"""
+Shared HTTP client so every agent reuses one pooled set of connections to the OpenAI API
+"""
+
+import asyncio
+import atexit
+import functools
+import logging
+
+import httpx
+from openai import AsyncOpenAI
+from pydantic_ai.models.openai import OpenAIModel
+
+from config import Config
+from . import _loop_thread
+
+logger = logging.getLogger(__name__)
+
+# Connection pool sized for all agents running concurrently (see agents.pipeline)
+MAX_CONNECTIONS = 64
+MAX_KEEPALIVE_CONNECTIONS = 32
+
+_shared_client = None
+
+
+def get_shared_client() -> httpx.AsyncClient:
+    """Get or create the HTTP client shared by every agent"""
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+            ),
+            # Long read timeout: large outputs (e.g. mockups) arrive in one response
+            timeout=httpx.Timeout(600, connect=5)
+        )
+    return _shared_client
+
+
+@functools.cache
+def openai_model(model_name: str = 'gpt-4o') -> OpenAIModel:
+    """Get the OpenAI model for pydantic_ai that talks through the shared client, one instance per model name"""
+    return OpenAIModel(model_name, openai_client=AsyncOpenAI(api_key=Config.OPENAI_API_KEY, http_client=get_shared_client()))
+
+
+def close_shared_client() -> None:
+    """Close the shared client on the loop that owns it, then stop that loop"""
+    global _shared_client
+    loop = _loop_thread._loop
+    if _shared_client is not None and not _shared_client.is_closed and loop is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(_shared_client.aclose(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Failed to close shared HTTP client: {e}")
+    _shared_client = None
+    openai_model.cache_clear()  # cached models hold the closed client
+    _loop_thread.shutdown()
+
+
+atexit.register(close_shared_client)
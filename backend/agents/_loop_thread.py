@@ -0,0 +1,58 @@
+"""
+One long-lived event loop on a background thread that every synchronous wrapper submits to,
+so the shared HTTP client's keep-alive connections survive between calls
+"""
+
+import asyncio
+import queue
+import threading
+from collections.abc import AsyncIterator, Iterator
+
+_loop = None
+_lock = threading.Lock()
+_DONE = object()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Get the background loop, starting its thread on first use"""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='agents-event-loop', daemon=True).start()
+        return _loop
+
+
+def run_sync(coro):
+    """Run a coroutine on the background loop and block until it returns"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+def iterate_sync(stream: AsyncIterator[str]) -> Iterator[str]:
+    """Consume an async generator on the background loop, yielding its items to synchronous code"""
+    items = queue.Queue()
+
+    # The whole generator runs inside one task so context vars it sets stay valid
+    async def pump():
+        try:
+            async for item in stream:
+                items.put(item)
+        finally:
+            items.put(_DONE)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_loop())
+    try:
+        while (item := items.get()) is not _DONE:
+            yield item
+        future.result()  # re-raise anything the generator raised
+    finally:
+        future.cancel()
+
+
+def shutdown() -> None:
+    """Stop the background loop (used at interpreter exit)"""
+    global _loop
+    with _lock:
+        if _loop is not None:
+            _loop.call_soon_threadsafe(_loop.stop)
+            _loop = None
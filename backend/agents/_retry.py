@@ -0,0 +1,181 @@
+"""
+Retry policy shared by every agent: exponential backoff with jitter and a per-model circuit breaker
+"""
+
+import asyncio
+import email.utils
+import functools
+import logging
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Longest server-requested wait (Retry-After / x-ratelimit-reset) we are willing to honor
+MAX_RETRY_AFTER = 60.0
+
+# HTTP statuses worth retrying; any other 4xx is the request's fault and will fail again
+RETRYABLE_STATUSES = {408, 409, 429}
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the model while its circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; after `reset_timeout`
+    seconds one probe call is let through (half-open) and its outcome closes or reopens it
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()  # sync wrappers run agents from several Flask threads
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return 'open'
+        return 'half_open'
+
+    def allow(self) -> bool:
+        """Whether a call may go through now"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(key: str) -> CircuitBreaker:
+    """Get the circuit breaker for a model key such as 'openai:gpt-4o'"""
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker()
+        return breaker
+
+
+def backoff_delay(attempt: int, base: float, cap: float, jitter: str = 'full') -> float:
+    """Delay before retry number `attempt` (0-based); 'full' jitter picks uniformly in [0, backoff]"""
+    delay = min(cap, base * 2 ** attempt)
+    if jitter == 'full':
+        return random.uniform(0, delay)
+    return delay
+
+
+def _parse_duration(value: str):
+    """Parse a Retry-After / x-ratelimit-reset value: seconds, an HTTP date, or e.g. '1m30s' / '250ms'"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts and ''.join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_after(error: Exception):
+    """Server-requested wait in seconds from the error's HTTP response headers, if any"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    if 'retry-after-ms' in headers:
+        try:
+            return min(float(headers['retry-after-ms']) / 1000, MAX_RETRY_AFTER)
+        except ValueError:
+            pass
+    for name in ('retry-after', 'x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens'):
+        if name in headers:
+            seconds = _parse_duration(headers[name])
+            if seconds is not None:
+                return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+    return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        return True  # timeouts, connection errors, malformed model output
+    return status >= 500 or status in RETRYABLE_STATUSES
+
+
+def retry_with_backoff(max_attempts: int = 5, base: float = 0.3, cap: float = 10.0,
+                       jitter: str = 'full', breaker_key: str = None):
+    """
+    Retry an async function with exponential backoff, honoring server rate-limit hints
+
+    Args:
+        max_attempts: Total number of calls before the last error is re-raised
+        base: Backoff for the first retry, doubled on each further attempt
+        cap: Upper bound on the backoff
+        jitter: 'full' for full jitter, anything else for plain exponential backoff
+        breaker_key: Circuit breaker to gate calls on; CircuitOpenError is raised while it is open
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            breaker = get_breaker(breaker_key) if breaker_key else None
+            for attempt in range(max_attempts):
+                if breaker is not None and not breaker.allow():
+                    raise CircuitOpenError(f"Circuit breaker open for {breaker_key}")
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    if not _is_retryable(e):
+                        # The service answered, so this says nothing about its health
+                        if breaker is not None:
+                            breaker.record_success()
+                        raise
+                    if breaker is not None:
+                        breaker.record_failure()
+                    if attempt == max_attempts - 1:
+                        raise
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = backoff_delay(attempt, base, cap, jitter)
+                    logger.warning("attempt %d/%d of %s failed: %s; retrying in %.2fs",
+                                   attempt + 1, max_attempts, func.__qualname__, e, delay)
+                    await asyncio.sleep(delay)
+                else:
+                    if breaker is not None:
+                        breaker.record_success()
+                    return result
+        return wrapper
+    return decorator
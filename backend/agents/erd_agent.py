@@ -1,85 +1,27 @@
-from pydantic_ai import Agent
-from pydantic import BaseModel
-import asyncio
-import os
 import json
-from config import Config
+from .models import TableDefinition, OutputType
+from ._loop_thread import run_sync
+from .result import Err, Ok, Result
+from .registry import AgentSpec, load_prompt, register, run_agent
 
-# API key imported here
-os.environ['OPENAI_API_KEY'] = Config.OPENAI_API_KEY
+GENERATE_ERD_DIAGRAM_PROMPT = load_prompt('erd')
 
-
-GENERATE_ERD_DIAGRAM_PROMPT = """
-You are an expert in generating database ERD diagrams from table definitions.
-Given the following table definitions, generate an ERD diagram in Mermaid syntax.
-
-IMPORTANT (formatting rules):
-- Return ONLY the Mermaid ERD text — no markdown fences, no commentary, and no extra text. The string will be rendered directly as a Mermaid diagram by the frontend.
-- Ensure primary keys and foreign keys are clearly marked using Mermaid ERD conventions.
-
-The table definitions will be provided as input. Each table has a name and columns with attributes.
-Generate a proper Mermaid ERD diagram showing:
-1. All entities (tables)
-2. All attributes (columns) with their types
-3. Primary keys marked appropriately
-4. Foreign key relationships between tables
-
-Example output (exact format expected):
-
-erDiagram
-    USER {
-        int id PK
-        string name
-        string email
-    }
-    ORDER {
-        int id PK
-        int user_id FK
-        float total
-    }
-    USER ||--o{ ORDER : places
-"""
-
-class TableDefinition(BaseModel):
-    table_definitions: str
-
-class OutputType(BaseModel):
-    erd_diagram: str
-
-erd_agent = Agent(
-    'openai:gpt-4o',
-    deps_type=TableDefinition,
-    result_type=OutputType,
+ERD_SPEC = register(AgentSpec(
+    name='erd',
+    label='ERD diagram',
     system_prompt=GENERATE_ERD_DIAGRAM_PROMPT,
-)
-
-async def generate_erd_diagram(table_definitions: str) -> str:
-    max_retries = 3
-    last_error = None
-    
-    for attempt in range(max_retries):
-        try:
-            # Create the input message with table definitions
-            message = f"Generate an ERD diagram for these tables: {table_definitions}"
-            
-            # Create deps object
-            deps = TableDefinition(table_definitions=table_definitions)
-            
-            # Run the agent with the message and deps
-            result = await erd_agent.run(message, deps=deps)
-
-            return result.data.erd_diagram
-        except Exception as e:
-            last_error = e
-            print(f"Attempt {attempt + 1} failed for ERD diagram generation: {str(e)}")
-            if attempt < max_retries - 1:
-                print(f"Retrying... ({attempt + 2}/{max_retries})")
-                await asyncio.sleep(1)  # Brief delay between retries
-    
-    print(f"All {max_retries} attempts failed for ERD diagram generation: {str(last_error)}")
-    return f"Error generating ERD diagram after {max_retries} attempts: {str(last_error)}"
+    input_model=TableDefinition,
+    output_model=OutputType,
+    message_template="Generate an ERD diagram for these tables: {table_definitions}",
+))
+
+async def generate_erd_diagram(table_definitions: str) -> Result[str]:
+    result = await run_agent(ERD_SPEC, table_definitions=table_definitions)
+    if isinstance(result, Err):
+        return result
+    return Ok(result.value['erd_diagram'])
     
-def generate_erd_diagram_sync(table_definitions: list) -> str:
+def generate_erd_diagram_sync(table_definitions: list) -> Result[str]:
     # Convert the list to a formatted JSON string for better readability by the AI
     table_definitions_str = json.dumps(table_definitions, indent=2)
-    return asyncio.run(generate_erd_diagram(table_definitions_str))
\ No newline at end of file
+    return run_sync(generate_erd_diagram(table_definitions_str))
\ No newline at end of file
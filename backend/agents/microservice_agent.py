@@ -1,96 +1,29 @@
-from pydantic_ai import Agent
-from pydantic import BaseModel
-import asyncio
-import os
-from config import Config
+from .models import MicroservicesInput, MicroservicesOutput
+from ._loop_thread import run_sync
+from .result import Result
+from .registry import AgentSpec, load_prompt, register, run_agent
 
-# Ensure API key is available
-os.environ['OPENAI_API_KEY'] = Config.OPENAI_API_KEY
+GENERATE_MICROSERVICES_PROMPT = load_prompt('microservices')
 
-GENERATE_MICROSERVICES_PROMPT = """
-You are an expert in designing microservices architectures. Given system requirements and optional constraints (scale, data consistency, protocols), generate a clear microservices architecture diagram in Mermaid syntax.
-
-IMPORTANT (formatting rules):
-- Return ONLY a valid Mermaid diagram string for the architecture — DO NOT include markdown fences (```), explanatory text, or any other commentary. The frontend will render the returned Mermaid string directly.
-- Also provide a JSON object named "service_summary" mapping service name -> short responsibility. Return this JSON after the Mermaid string in the same output.
-
-The diagram should include:
-1. Individual services (with clear names; include technology hints if relevant)
-2. Datastores and dataflow between services
-3. API gateways or ingress points
-4. Messaging components (queues, event buses) where appropriate
-5. External integrations and third-party services
-6. Deployment hints (k8s, containers) if requested
-
-Example output (exact format expected):
-
-graph TB
-    API[API Gateway] --> Auth[Auth Service]
-    API --> Orders[Order Service]
-    Orders --> OrdersDB[(Orders DB)]
-    API --> Inventory[Inventory Service]
-    Inventory --> InventoryDB[(Inventory DB)]
-
-service_summary:
-{
-    "Auth Service": "Handles authentication and JWT issuance",
-    "Order Service": "Processes orders and writes to Orders DB",
-    "Inventory Service": "Manages stock levels and inventory DB",
-    "API Gateway": "Ingress and routing, rate-limiting"
-}
-"""
-
-class MicroservicesInput(BaseModel):
-    requirements: str
-    scale: str = "medium"
-    consistency: str = "eventual"
-
-class MicroservicesOutput(BaseModel):
-    architecture_diagram: str
-    service_summary: str
-
-microservice_agent = Agent(
-    'openai:gpt-4o',
-    deps_type=MicroservicesInput,
-    result_type=MicroservicesOutput,
+MICROSERVICES_SPEC = register(AgentSpec(
+    name='microservices',
+    label='microservices architecture',
     system_prompt=GENERATE_MICROSERVICES_PROMPT,
-)
-
-async def generate_microservices(requirements: str, scale: str = "medium", consistency: str = "eventual") -> dict:
-    max_retries = 3
-    last_error = None
-    
-    for attempt in range(max_retries):
-        try:
-            message = f"""
-            Generate a microservices architecture diagram according to these inputs:
-
-            Requirements: {requirements}
-            Scale: {scale}
-            Consistency: {consistency}
+    input_model=MicroservicesInput,
+    output_model=MicroservicesOutput,
+    message_template="""
+Generate a microservices architecture diagram according to these inputs:
 
-            Please return a Mermaid diagram and a JSON service summary.
-            """
+Requirements: {requirements}
+Scale: {scale}
+Consistency: {consistency}
 
-            deps = MicroservicesInput(requirements=requirements, scale=scale, consistency=consistency)
-            result = await microservice_agent.run(message, deps=deps)
+Please return a Mermaid diagram and a JSON service summary.
+""",
+))
 
-            return {
-                'architecture_diagram': result.data.architecture_diagram,
-                'service_summary': result.data.service_summary
-            }
-        except Exception as e:
-            last_error = e
-            print(f"Attempt {attempt + 1} failed for microservices architecture generation: {str(e)}")
-            if attempt < max_retries - 1:
-                print(f"Retrying... ({attempt + 2}/{max_retries})")
-                await asyncio.sleep(1)  # Brief delay between retries
-    
-    print(f"All {max_retries} attempts failed for microservices architecture generation: {str(last_error)}")
-    return {
-        'architecture_diagram': f"Error generating architecture diagram after {max_retries} attempts: {str(last_error)}",
-        'service_summary': f"Error after {max_retries} attempts: {str(last_error)}"
-    }
+async def generate_microservices(requirements: str, scale: str = "medium", consistency: str = "eventual") -> Result[dict]:
+    return await run_agent(MICROSERVICES_SPEC, requirements=requirements, scale=scale, consistency=consistency)
 
-def generate_microservices_sync(requirements: str, scale: str = "medium", consistency: str = "eventual") -> dict:
-    return asyncio.run(generate_microservices(requirements, scale, consistency))
+def generate_microservices_sync(requirements: str, scale: str = "medium", consistency: str = "eventual") -> Result[dict]:
+    return run_sync(generate_microservices(requirements, scale, consistency))
\ No newline at end of file
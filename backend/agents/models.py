@@ -0,0 +1,95 @@
+"""
+Input and output models for every agent
+"""
+
+from pydantic import BaseModel
+
+
+# dataflow_agent
+class DataflowInput(BaseModel):
+    description: str
+    components: str = ""
+
+
+class DataflowOutput(BaseModel):
+    dataflow_diagram: str
+    component_summary: str
+
+
+# erd_agent
+class TableDefinition(BaseModel):
+    table_definitions: str
+
+
+class OutputType(BaseModel):
+    erd_diagram: str
+
+
+# microservice_agent
+class MicroservicesInput(BaseModel):
+    requirements: str
+    scale: str = "medium"
+    consistency: str = "eventual"
+
+
+class MicroservicesOutput(BaseModel):
+    architecture_diagram: str
+    service_summary: str
+
+
+# mockups_agent
+class MockupsInput(BaseModel):
+    description: str
+    design_preferences: str = ""
+    screens: str = ""
+
+
+class MockupsOutput(BaseModel):
+    mockups_data: str
+    design_summary: str
+
+
+# palette_diagram
+class PaletteInput(BaseModel):
+    description: str
+    style_hints: str = ""
+
+
+class PaletteOutput(BaseModel):
+    palette_diagram: str
+    color_summary: str
+
+
+# sequence_agent
+class SequenceInput(BaseModel):
+    description: str
+    actors: str = ""
+
+
+class SequenceOutput(BaseModel):
+    sequence_diagram: str
+    participant_summary: str
+
+
+# srs_report_agent
+class SRSInput(BaseModel):
+    description: str
+    requirements: str = ""
+    audience: str = ""
+
+
+class SRSOutput(BaseModel):
+    srs_document: str
+    srs_summary: str
+
+
+# sys_arch_agent
+class SystemRequirements(BaseModel):
+    requirements: str
+    technology_stack: str = ""
+    deployment_type: str = "web"
+
+
+class ArchitectureOutput(BaseModel):
+    architecture_diagram: str
+    component_summary: str
@@ -0,0 +1,86 @@
+"""
+Run every documentation agent for a project concurrently in a single event loop
+"""
+
+import asyncio
+import json
+import logging
+
+from ._loop_thread import run_sync
+from .result import Err
+from .dataflow_agent import generate_dataflow
+from .erd_agent import generate_erd_diagram
+from .microservice_agent import generate_microservices
+from .mockups_agent import generate_mockups
+from .palette_diagram import generate_palette
+from .sequence_agent import generate_sequence
+from .srs_report_agent import generate_srs
+from .sys_arch_agent import generate_system_architecture
+
+logger = logging.getLogger(__name__)
+
+
+async def generate_all_async(
+    description: str,
+    table_definitions: list = None,
+    requirements: str = "",
+    components: str = "",
+    actors: str = "",
+    style_hints: str = "",
+    design_preferences: str = "",
+    screens: list | str = "",
+    audience: str = "",
+    technology_stack: str = "",
+    deployment_type: str = "web",
+    scale: str = "medium",
+    consistency: str = "eventual",
+) -> dict:
+    """
+    Fire all agent calls at once so the total latency is the slowest call, not the sum
+
+    Args:
+        description: Project description shared by every agent
+        table_definitions: Optional table definitions for the ERD (defaults to the description)
+        requirements: Optional requirements for the architecture agents (defaults to the description)
+
+    Returns:
+        dict: Agent name -> that agent's Result
+    """
+    requirements = requirements or description
+    erd_input = json.dumps(table_definitions or [description], indent=2)
+
+    coros = {
+        'srs': generate_srs(description, requirements, audience),
+        'erd': generate_erd_diagram(erd_input),
+        'architecture': generate_system_architecture(requirements, technology_stack, deployment_type),
+        'dataflow': generate_dataflow(description, components),
+        'sequence': generate_sequence(description, actors),
+        'palette': generate_palette(description, style_hints),
+        'microservices': generate_microservices(requirements, scale, consistency),
+        'mockups': generate_mockups(description, design_preferences, screens),
+    }
+
+    results = await asyncio.gather(*coros.values(), return_exceptions=True)
+
+    bundle = {}
+    for name, result in zip(coros, results):
+        if isinstance(result, Exception):
+            result = Err(str(result))
+        if isinstance(result, Err):
+            logger.error(f"Agent '{name}' failed: {result.error}")
+        bundle[name] = result
+    return bundle
+
+
+def generate_all_sync(description: str, **kwargs) -> dict:
+    """
+    Synchronous wrapper for running all agents in one event loop
+
+    Args:
+        description: Project description shared by every agent
+        **kwargs: Optional per-agent inputs accepted by generate_all_async
+
+    Returns:
+        dict: Agent name -> that agent's Result
+    """
+    return run_sync(generate_all_async(description, **kwargs))
@@ -0,0 +1,206 @@
+"""
+Data-driven agent registry: each agent is an AgentSpec, and all of them share one run loop
+"""
+
+import asyncio
+import functools
+import logging
+import os
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+
+from pydantic import BaseModel, ValidationError
+from pydantic_ai import Agent
+
+from . import _cache
+from ._http import openai_model
+from ._retry import CircuitOpenError, _is_retryable, _retry_after, backoff_delay, get_breaker, retry_with_backoff
+from .result import Err, Ok, Result
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = os.path.join(os.path.dirname(__file__), 'prompts')
+
+MODEL_NAME = 'gpt-4o'
+MAX_RETRIES = 5
+RETRY_BASE = 0.3
+RETRY_CAP = 10
+BREAKER_KEY = f'openai:{MODEL_NAME}'
+
+
+@dataclass(frozen=True)
+class AgentSpec:
+    """Everything that distinguishes one agent from another"""
+    name: str
+    label: str  # used in log and error messages, e.g. "dataflow diagram"
+    system_prompt: str
+    input_model: type
+    output_model: type
+    message_template: str
+    # Fallback text substituted into the message for inputs left empty
+    message_defaults: dict = field(default_factory=dict)
+    # message_template.format_map, bound once per spec
+    format_message: Callable[[dict], str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'format_message', self.message_template.format_map)
+
+
+def load_prompt(name: str) -> str:
+    """
+    Read a system prompt from agents/prompts/<name>.txt, byte for byte
+
+    System prompts are the static prefix of every request to the model, which is what lets the
+    provider cache them; request data goes only into the spec's message_template, never in here.
+    """
+    with open(os.path.join(PROMPTS_DIR, f'{name}.txt'), encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+_specs = {}
+
+
+def register(spec: AgentSpec) -> AgentSpec:
+    """Add an agent spec to the registry"""
+    _specs[spec.name] = spec
+    return spec
+
+
+def get_spec(name: str) -> AgentSpec:
+    return _specs[name]
+
+
+@functools.cache
+def get_agent(name: str) -> Agent:
+    """Get the pydantic_ai Agent for a registered spec, built on first use"""
+    spec = _specs[name]
+    return Agent(
+        openai_model(MODEL_NAME),
+        deps_type=spec.input_model,
+        result_type=spec.output_model,
+        system_prompt=spec.system_prompt,
+    )
+
+
+def _build_message(spec: AgentSpec, inputs: dict) -> str:
+    defaults = spec.message_defaults
+    return spec.format_message({name: value or defaults.get(name, value) for name, value in inputs.items()})
+
+
+@retry_with_backoff(max_attempts=MAX_RETRIES, base=RETRY_BASE, cap=RETRY_CAP, jitter='full',
+                    breaker_key=BREAKER_KEY)
+async def _run_once(agent: Agent, message: str, deps: BaseModel) -> dict:
+    result = await agent.run(message, deps=deps)
+    # pydantic_ai already validated the tool-call JSON into the output model;
+    # copy its field dict as-is instead of dumping or re-validating it
+    return dict(result.data.__dict__)
+
+
+async def run_agent(spec: AgentSpec, **inputs) -> Result[dict]:
+    """
+    Run a registered agent with retries and result caching
+
+    Args:
+        spec: The agent to run
+        **inputs: Field values for the spec's input model
+
+    Returns:
+        Result: Ok with the output model's fields as a dict, or Err with the reason it failed
+                (also returned without calling the model while its circuit breaker is open)
+    """
+    # Request bodies reach here field by field without type checks, so validate them first
+    try:
+        deps = spec.input_model.model_validate(inputs)
+    except ValidationError as e:
+        logger.error("%s got invalid inputs: %s", spec.name, e)
+        return Err(f"Invalid input for {spec.label}: {e}")
+
+    key = _cache.make_key(spec.name, spec.system_prompt, inputs)
+    hit = await _cache.load(key)
+    if hit is not None:
+        logger.info("agent cache hit for %s", spec.name)
+        return Ok(hit)
+
+    agent = get_agent(spec.name)
+    message = _build_message(spec, inputs)
+
+    try:
+        output = await _run_once(agent, message, deps)
+    except Exception as e:
+        logger.error("%s generation failed: %s", spec.name, e)
+        return Err(f"Error generating {spec.label}: {e}")
+
+    await _cache.store(key, output)
+    return Ok(output)
+
+
+async def stream_agent(spec: AgentSpec, field_name: str, **inputs) -> AsyncIterator[str]:
+    """
+    Run a registered agent, yielding one output field's text as it is generated
+
+    The call is gated on the same circuit breaker as run_agent, and retried with the same
+    backoff as long as nothing has been yielded yet; once text has gone out, a stream can't
+    be replayed, so a later failure is raised to the caller. A cached result is yielded in
+    one chunk and a completed stream is cached like a run_agent result.
+
+    Args:
+        spec: The agent to run
+        field_name: Output field to stream, e.g. 'dataflow_diagram'
+        **inputs: Field values for the spec's input model
+
+    Yields:
+        str: The next piece of the field's text
+
+    Raises:
+        ValidationError: If the inputs don't fit the spec's input model
+        CircuitOpenError: If the model's circuit breaker is open
+    """
+    deps = spec.input_model.model_validate(inputs)
+    key = _cache.make_key(spec.name, spec.system_prompt, inputs)
+    hit = await _cache.load(key)
+    if hit is not None:
+        logger.info("agent cache hit for %s", spec.name)
+        yield hit[field_name]
+        return
+
+    agent = get_agent(spec.name)
+    message = _build_message(spec, inputs)
+    breaker = get_breaker(BREAKER_KEY)
+    sent = 0
+    data = None
+    for attempt in range(MAX_RETRIES):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit breaker open for {BREAKER_KEY}")
+        try:
+            async with agent.run_stream(message, deps=deps) as result:
+                # Each item is the whole output so far, validated in partial mode
+                async for data in result.stream(debounce_by=0.05):
+                    text = getattr(data, field_name, None) or ""
+                    if len(text) > sent:
+                        yield text[sent:]
+                        sent = len(text)
+        except Exception as e:
+            if not _is_retryable(e):
+                # The service answered, so this says nothing about its health
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if sent or attempt == MAX_RETRIES - 1:
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = backoff_delay(attempt, RETRY_BASE, RETRY_CAP)
+            logger.warning("attempt %d/%d of %s stream failed: %s; retrying in %.2fs",
+                           attempt + 1, MAX_RETRIES, spec.name, e, delay)
+            await asyncio.sleep(delay)
+        except BaseException:
+            # The consumer went away mid-stream; text had arrived, so the model was answering
+            if sent:
+                breaker.record_success()
+            raise
+        else:
+            breaker.record_success()
+            break
+
+    if data is not None:
+        await _cache.store(key, dict(data.__dict__))
@@ -0,0 +1,21 @@
+"""
+Typed result returned by every generate_* function: Ok with the agent's output, or Err with the reason
+"""
+
+from dataclasses import dataclass
+from typing import Generic, TypeVar, Union
+
+T = TypeVar('T')
+
+
+@dataclass(frozen=True, slots=True)
+class Ok(Generic[T]):
+    value: T
+
+
+@dataclass(frozen=True, slots=True)
+class Err:
+    error: str
+
+
+Result = Union[Ok[T], Err]
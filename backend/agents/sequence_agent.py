@@ -1,130 +1,33 @@
-from pydantic_ai import Agent
-from pydantic import BaseModel
-import asyncio
-import os
-from config import Config
+from .models import SequenceInput, SequenceOutput
+from ._loop_thread import run_sync
+from .result import Result
+from .registry import AgentSpec, load_prompt, register, run_agent
 
-# Ensure API key is available to the agent
-os.environ['OPENAI_API_KEY'] = Config.OPENAI_API_KEY
+GENERATE_SEQUENCE_DIAGRAM_PROMPT = load_prompt('sequence')
 
-GENERATE_SEQUENCE_DIAGRAM_PROMPT = """
-You are an expert in generating sequence diagrams from interaction descriptions.
-Given a description of interactions between actors, services, and data stores, generate a clear sequence diagram in Mermaid syntax.
-
-IMPORTANT (formatting rules):
-- Return ONLY the Mermaid sequenceDiagram string — no markdown fences, no commentary. The frontend will render the returned Mermaid string directly.
-- Also provide a JSON object named "participants_summary" mapping participant -> short role/notes. Return this JSON after the Mermaid string.
-
-The input will contain a textual description and optional actor list. Produce a Mermaid sequenceDiagram illustrating:
-1. All actors and participants
-2. Messages between participants with labels
-3. Lifelines for long-running processes where applicable
-4. Notes or annotations for important steps
-
-Example output (exact format expected):
-
-sequenceDiagram
-    participant User
-    participant API
-    participant Auth
-    participant DB
-
-    User->>API: Submit order
-    API->>Auth: Validate token
-    API->>DB: Create order record
-    DB-->>API: Order created
-    API-->>User: Confirmation
-
-participants_summary:
-{
-    "User": "End user interacting with the UI",
-    "API": "Backend API handling requests",
-    "Auth": "Authentication service validating tokens",
-    "DB": "Persistent datastore for orders"
-}
-
-Example mermaid output:
-
-```mermaid
-sequenceDiagram
-        participant User
-        participant API
-        participant Auth
-        participant DB
-
-        User->>API: Submit order
-        API->>Auth: Validate token
-        API->>DB: Create order record
-        DB-->>API: Order created
-        API-->>User: Confirmation
-```
-
-Example participant summary output:
-
-participants_summary:
-{
-    "User": "End user interacting with the UI",
-    "API": "Backend API handling requests",
-    "Auth": "Authentication service validating tokens",
-    "DB": "Persistent datastore for orders"
-}
-"""
-
-
-class SequenceInput(BaseModel):
-    description: str
-    actors: str = ""
-
-class SequenceOutput(BaseModel):
-    sequence_diagram: str
-    participant_summary: str
-
-sequence_agent = Agent(
-    'openai:gpt-4o',
-    deps_type=SequenceInput,
-    result_type=SequenceOutput,
+SEQUENCE_SPEC = register(AgentSpec(
+    name='sequence',
+    label='sequence diagram',
     system_prompt=GENERATE_SEQUENCE_DIAGRAM_PROMPT,
-)
-
-async def generate_sequence(description: str, actors: str = "") -> dict:
-    max_retries = 3
-    last_error = None
-    
-    for attempt in range(max_retries):
-        try:
-            message = f"""
-            Generate a sequence diagram for the following interaction description:
-
-            Description: {description}
-
-            Actors: {actors if actors else 'Not specified - infer actors from description'}
+    input_model=SequenceInput,
+    output_model=SequenceOutput,
+    message_template="""
+Generate a sequence diagram for the following interaction description:
 
-            Please return a Mermaid sequenceDiagram and a concise JSON summary of participants.
-            """
+Description: {description}
 
-            deps = SequenceInput(description=description, actors=actors)
+Actors: {actors}
 
-            result = await sequence_agent.run(message, deps=deps)
+Please return a Mermaid sequenceDiagram and a concise JSON summary of participants.
+""",
+    message_defaults={'actors': 'Not specified - infer actors from description'},
+))
 
-            return {
-                'sequence_diagram': result.data.sequence_diagram,
-                'participant_summary': result.data.participant_summary
-            }
-        except Exception as e:
-            last_error = e
-            print(f"Attempt {attempt + 1} failed for sequence diagram generation: {str(e)}")
-            if attempt < max_retries - 1:
-                print(f"Retrying... ({attempt + 2}/{max_retries})")
-                await asyncio.sleep(1)  # Brief delay between retries
-    
-    print(f"All {max_retries} attempts failed for sequence diagram generation: {str(last_error)}")
-    return {
-        'sequence_diagram': f"Error generating sequence diagram after {max_retries} attempts: {str(last_error)}",
-        'participant_summary': f"Error after {max_retries} attempts: {str(last_error)}"
-    }
+async def generate_sequence(description: str, actors: str = "") -> Result[dict]:
+    return await run_agent(SEQUENCE_SPEC, description=description, actors=actors)
 
-def generate_sequence_sync(description: str, actors: str = "") -> dict:
+def generate_sequence_sync(description: str, actors: str = "") -> Result[dict]:
     """
     Synchronous wrapper for generating sequence diagrams
     """
-    return asyncio.run(generate_sequence(description, actors))
+    return run_sync(generate_sequence(description, actors))
\ No newline at end of file
@@ -1,56 +1,58 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file; skipped in prod (the platform provides
+# the environment) or when SKIP_DOTENV=1
+if os.environ.get('SKIP_DOTENV') != '1' and os.environ.get('ENVIRONMENT_TYPE', 'dev').lower() != 'prod':
+    load_dotenv()
+
+# Snapshot of the environment; it doesn't change after startup
+_ENV = dict(os.environ)
 
 class Config:
     """Base configuration class"""
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
-    DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
-    HOST = os.environ.get('FLASK_HOST', '0.0.0.0')
-    PORT = int(os.environ.get('FLASK_PORT', 5000))
+    SECRET_KEY = _ENV.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
+    DEBUG = _ENV.get('FLASK_DEBUG', 'False').lower() == 'true'
+    HOST = _ENV.get('FLASK_HOST', '0.0.0.0')
+    PORT = int(_ENV.get('FLASK_PORT', 5000))
     
     # Environment type (dev/prod)
-    ENVIRONMENT_TYPE = os.environ.get('ENVIRONMENT_TYPE', 'dev').lower()
+    ENVIRONMENT_TYPE = _ENV.get('ENVIRONMENT_TYPE', 'dev').lower()
+    IS_PROD = ENVIRONMENT_TYPE == 'prod'
     
     # Database configuration (if needed later)
-    DATABASE_URL = os.environ.get('DATABASE_URL')
+    DATABASE_URL = _ENV.get('DATABASE_URL')
 
     # OpenAI API Key
-    OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', 'your-openai-api-key')
+    OPENAI_API_KEY = _ENV.get('OPENAI_API_KEY', 'your-openai-api-key')
+
+    # Agent result cache (SQLite); a TTL of 0 disables caching
+    AGENT_CACHE_PATH = _ENV.get('AGENT_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'agent_cache.sqlite3'))
+    AGENT_CACHE_TTL = int(_ENV.get('AGENT_CACHE_TTL', 7 * 24 * 3600))
     
     # Server URLs based on environment
-    BACKEND_URL_DEV = os.environ.get('BACKEND_URL_DEV', 'http://127.0.0.1:5000')
-    FRONTEND_URL_DEV = os.environ.get('FRONTEND_URL_DEV', 'http://localhost:3000')
-    BACKEND_URL_PROD = os.environ.get('BACKEND_URL_PROD', 'https://desirable-gentleness-production.up.railway.app')
-    FRONTEND_URL_PROD = os.environ.get('FRONTEND_URL_PROD', 'https://global-hackathon-v1-production.up.railway.app')
-    
-    # Dynamic URL selection based on environment
-    @property
-    def BACKEND_URL(self):
-        return self.BACKEND_URL_PROD if self.ENVIRONMENT_TYPE == 'prod' else self.BACKEND_URL_DEV
+    BACKEND_URL_DEV = _ENV.get('BACKEND_URL_DEV', 'http://127.0.0.1:5000')
+    FRONTEND_URL_DEV = _ENV.get('FRONTEND_URL_DEV', 'http://localhost:3000')
+    BACKEND_URL_PROD = _ENV.get('BACKEND_URL_PROD', 'https://desirable-gentleness-production.up.railway.app')
+    FRONTEND_URL_PROD = _ENV.get('FRONTEND_URL_PROD', 'https://global-hackathon-v1-production.up.railway.app')
     
-    @property
-    def FRONTEND_URL(self):
-        return self.FRONTEND_URL_PROD if self.ENVIRONMENT_TYPE == 'prod' else self.FRONTEND_URL_DEV
+    # URL selection based on environment, resolved once at import
+    BACKEND_URL = BACKEND_URL_PROD if IS_PROD else BACKEND_URL_DEV
+    FRONTEND_URL = FRONTEND_URL_PROD if IS_PROD else FRONTEND_URL_DEV
     
-    # CORS configuration - dynamic based on environment
-    @property
-    def CORS_ORIGINS(self):
-        cors_env = os.environ.get('CORS_ORIGINS')
-        if cors_env:
-            return cors_env.split(',')
-        
+    # CORS configuration - based on environment
+    if _ENV.get('CORS_ORIGINS'):
+        CORS_ORIGINS = _ENV['CORS_ORIGINS'].split(',')
+    elif ENVIRONMENT_TYPE == 'prod':
         # Default CORS origins based on environment
-        if self.ENVIRONMENT_TYPE == 'prod':
-            return [self.FRONTEND_URL_PROD, 'http://localhost:5000', 'http://127.0.0.1:5000']
-        else:
-            return ['http://localhost:3000', 'http://127.0.0.1:3000', 'http://localhost:5173', 'http://127.0.0.1:5173']
+        CORS_ORIGINS = [FRONTEND_URL_PROD, 'http://localhost:5000', 'http://127.0.0.1:5000']
+    else:
+        CORS_ORIGINS = ['http://localhost:3000', 'http://127.0.0.1:3000', 'http://localhost:5173', 'http://127.0.0.1:5173']
     
     # Logging configuration
-    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
-    LOG_FILE = os.environ.get('LOG_FILE', 'app.log')
+    LOG_LEVEL = _ENV.get('LOG_LEVEL', 'INFO')
+    LOG_FILE = _ENV.get('LOG_FILE', 'app.log')
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -1,63 +1,121 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
+from pydantic import ValidationError
 import os
 import logging
-import json
-from config import config
+import logging.handlers
+import queue
+import atexit
+from config import Config, config
+from json_provider import OrjsonProvider
 from pdf_generator import PDFGenerator
 from agents.erd_agent import generate_erd_diagram_sync
 from agents.sys_arch_agent import generate_system_architecture_sync
-from agents.dataflow_agent import generate_dataflow_sync
+from agents.dataflow_agent import generate_dataflow_sync, generate_dataflow_stream_sync
 from agents.sequence_agent import generate_sequence_sync
 from agents.palette_diagram import generate_palette_sync
 from agents.microservice_agent import generate_microservices_sync
 from agents.srs_report_agent import generate_srs_sync
 from agents.mockups_agent import generate_mockups_sync
+from agents.pipeline import generate_all_sync
+from agents.result import Err
+from agents._retry import CircuitOpenError
 
 logger = logging.getLogger(__name__)
 
+# CORS origins, built once at import: every known frontend
+_CORS_ORIGINS = ("http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:5173", "https://global-hackathon-v1-production.up.railway.app", "https://desirable-gentleness-production.up.railway.app", "http://localhost:5000")
+
+# Starts the last line of a streamed response that failed after it began; the text before it is incomplete
+STREAM_ERROR_MARKER = '[STREAM_ERROR]'
+
+# Max log records waiting for the listener thread; records beyond this are dropped
+LOG_QUEUE_SIZE = 10000
+
+_log_listener = None
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking the caller"""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def configure_logging():
+    """Route all logging through a bounded queue so handler I/O runs on one background thread"""
+    global _log_listener
+    # Leave logging alone if it is already set up (by us, or by the host server)
+    if _log_listener is not None or logging.getLogger().handlers:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    root = logging.getLogger()
+    # Prod keeps only warnings and errors, skipping the per-request info logs
+    root.setLevel(logging.WARNING if Config.IS_PROD else logging.INFO)
+    root.addHandler(_DroppingQueueHandler(log_queue))
+
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+
+# Configure logging once at import, not on every create_app() call
+configure_logging()
+
 def create_app(config_name=None):
     """Application factory pattern"""
     
     # Create Flask app
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     
     # Load configuration
     config_name = config_name or os.environ.get('FLASK_ENV', 'default')
     app.config.from_object(config[config_name])
     
-    # Initialize CORS with dynamic origins
-    CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:5173", "https://global-hackathon-v1-production.up.railway.app", "https://desirable-gentleness-production.up.railway.app", "http://localhost:5000"])
-    
-    # Configure basic logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    # Initialize CORS with the origins computed at import
+    CORS(app, origins=_CORS_ORIGINS)
     
     # Log app creation
     logger.info(f"Flask app created with config: {config_name}")
     
+    # Environment name reported by the health and test endpoints, read once
+    env_name = os.environ.get('FLASK_ENV', 'development')
+    
+    # Static response bodies, serialized once; each request still gets its own
+    # Response object since CORS and other after-request hooks mutate headers
+    home_body = app.json.dumps({
+        'message': 'Welcome to the Flask Backend API',
+        'status': 'success',
+        'version': '1.0.0'
+    })
+    health_body = app.json.dumps({
+        'status': 'healthy',
+        'message': 'Server is running',
+        'timestamp': env_name
+    })
+    
     # Basic routes
     @app.route('/')
     def home():
         """Home endpoint"""
         logger.info("Home endpoint accessed")
-        return jsonify({
-            'message': 'Welcome to the Flask Backend API',
-            'status': 'success',
-            'version': '1.0.0'
-        })
+        return app.response_class(home_body, mimetype='application/json')
     
     @app.route('/health')
     def health_check():
         """Health check endpoint"""
-        logger.info("Health check endpoint accessed")
-        return jsonify({
-            'status': 'healthy',
-            'message': 'Server is running',
-            'timestamp': str(os.environ.get('FLASK_ENV', 'development'))
-        })
+        # Debug level: platform health probes hit this constantly
+        logger.debug("Health check endpoint accessed")
+        return app.response_class(health_body, mimetype='application/json')
     
     @app.route('/api/test')
     def test_endpoint():
@@ -65,13 +123,14 @@ def create_app(config_name=None):
         logger.info("Test endpoint accessed")
         
         # Log request details
-        logger.debug(f"Request method: {request.method}")
-        logger.debug(f"Request headers: {dict(request.headers)}")
+        logger.debug("Request method: %s", request.method)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request headers: %s", dict(request.headers))
         
         return jsonify({
             'message': 'API test successful',
             'method': request.method,
-            'timestamp': str(os.environ.get('FLASK_ENV', 'development'))
+            'timestamp': env_name
         })
     
     @app.route('/api/echo', methods=['POST', 'GET'])
@@ -81,21 +140,21 @@ def create_app(config_name=None):
         
         try:
             data = request.get_json()
-            logger.debug(f"Received data: {data}")
-            
-            return jsonify({
-                'message': 'Echo successful',
-                'received_data': data,
-                'status': 'success'
-            })
-        except Exception as e:
-            logger.error(f"Error in echo endpoint: {str(e)}")
+        except HTTPException as e:
+            # Anything that isn't a JSON body (including a bare GET) is a bad request here
             return jsonify({
                 'message': 'Error processing request',
                 'error': str(e),
                 'status': 'error'
             }), 400
-    
+        logger.debug("Received data: %s", data)
+        
+        return jsonify({
+            'message': 'Echo successful',
+            'received_data': data,
+            'status': 'success'
+        })
+
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -115,6 +174,21 @@ def create_app(config_name=None):
             'code': 500
         }), 500
     
+    @app.errorhandler(Exception)
+    def unhandled_exception(error):
+        """Turn any exception raised by an endpoint into the standard JSON error response"""
+        if isinstance(error, HTTPException):
+            # Aborts and bad requests (e.g. malformed JSON) keep their own status code
+            return jsonify({
+                'error': error.description,
+                'status': 'error'
+            }), error.code
+        logger.error(f"Error in {request.path}: {str(error)}")
+        return jsonify({
+            'error': str(error),
+            'status': 'error'
+        }), 500
+    
     @app.route('/favicon.ico')
     def favicon():
         """Favicon endpoint to prevent 500 errors"""
@@ -125,288 +199,374 @@ def create_app(config_name=None):
     @app.route('/api/generate_erd', methods=['POST'])
     def generate_erd():
         """Endpoint to generate ERD diagram"""
-        try:
-            data = request.get_json()
-            if not data:
-                return jsonify({
-                    'error': 'No JSON data provided',
-                    'status': 'error'
-                }), 400
-                
-            table_definitions = data.get('table_definitions', [])
-            if not table_definitions:
-                return jsonify({
-                    'error': 'No table_definitions provided',
-                    'status': 'error'
-                }), 400
-
-            logger.info(f"Generating ERD for {len(table_definitions)} tables")
-            erd_diagram = generate_erd_diagram_sync(table_definitions)
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'error': 'No JSON data provided',
+                'status': 'error'
+            }), 400
             
+        table_definitions = data.get('table_definitions', [])
+        if not table_definitions:
             return jsonify({
-                'erd_diagram': erd_diagram,
-                'status': 'success'
-            })
-        except Exception as e:
-            logger.error(f"Error in generate_erd endpoint: {str(e)}")
+                'error': 'No table_definitions provided',
+                'status': 'error'
+            }), 400
+
+        logger.info(f"Generating ERD for {len(table_definitions)} tables")
+        result = generate_erd_diagram_sync(table_definitions)
+        if isinstance(result, Err):
             return jsonify({
-                'error': str(e),
+                'error': result.error,
                 'status': 'error'
-            }), 500
+            }), 502
+
+        return jsonify({
+            'erd_diagram': result.value,
+            'status': 'success'
+        })
 
     # endpoint for system architecture diagram generation
     @app.route('/api/generate_architecture', methods=['POST'])
     def generate_architecture():
         """Endpoint to generate system architecture diagram"""
-        try:
-            data = request.get_json()
-            if not data:
-                return jsonify({
-                    'error': 'No JSON data provided',
-                    'status': 'error'
-                }), 400
-                
-            requirements = data.get('requirements', '')
-            if not requirements:
-                return jsonify({
-                    'error': 'No requirements provided',
-                    'status': 'error'
-                }), 400
-
-            # Optional parameters
-            technology_stack = data.get('technology_stack', '')
-            deployment_type = data.get('deployment_type', 'web')
-
-            logger.info(f"Generating system architecture for: {requirements[:100]}...")
-            result = generate_system_architecture_sync(requirements, technology_stack, deployment_type)
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'error': 'No JSON data provided',
+                'status': 'error'
+            }), 400
             
+        requirements = data.get('requirements', '')
+        if not requirements:
             return jsonify({
-                'architecture_diagram': result['architecture_diagram'],
-                'component_summary': result['component_summary'],
-                'status': 'success'
-            })
-        except Exception as e:
-            logger.error(f"Error in generate_architecture endpoint: {str(e)}")
+                'error': 'No requirements provided',
+                'status': 'error'
+            }), 400
+
+        # Optional parameters
+        technology_stack = data.get('technology_stack', '')
+        deployment_type = data.get('deployment_type', 'web')
+
+        logger.info(f"Generating system architecture for: {requirements[:100]}...")
+        result = generate_system_architecture_sync(requirements, technology_stack, deployment_type)
+        if isinstance(result, Err):
             return jsonify({
-                'error': str(e),
+                'error': result.error,
                 'status': 'error'
-            }), 500
+            }), 502
+        output = result.value
+
+        return jsonify({
+            'architecture_diagram': output['architecture_diagram'],
+            'component_summary': output['component_summary'],
+            'status': 'success'
+        })
 
     # endpoint for dataflow diagram generation
     @app.route('/api/generate_dataflow', methods=['POST'])
     def generate_dataflow():
         """Endpoint to generate dataflow diagram"""
-        try:
-            data = request.get_json()
-            if not data:
-                return jsonify({
-                    'error': 'No JSON data provided',
-                    'status': 'error'
-                }), 400
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'error': 'No JSON data provided',
+                'status': 'error'
+            }), 400
 
-            description = data.get('description', '')
-            components = data.get('components', '')
-            if not description:
-                return jsonify({
-                    'error': 'No description provided',
-                    'status': 'error'
-                }), 400
+        description = data.get('description', '')
+        components = data.get('components', '')
+        if not description:
+            return jsonify({
+                'error': 'No description provided',
+                'status': 'error'
+            }), 400
+
+        logger.info(f"Generating dataflow diagram for description length {len(description)}")
+        result = generate_dataflow_sync(description, components)
+        if isinstance(result, Err):
+            return jsonify({
+                'error': result.error,
+                'status': 'error'
+            }), 502
+        output = result.value
 
-            logger.info(f"Generating dataflow diagram for description length {len(description)}")
-            result = generate_dataflow_sync(description, components)
+        return jsonify({
+            'dataflow_diagram': output.get('dataflow_diagram'),
+            'component_summary': output.get('component_summary'),
+            'status': 'success'
+        })
 
+    # endpoint for streaming the dataflow diagram as it is generated
+    @app.route('/api/generate_dataflow/stream', methods=['POST'])
+    def generate_dataflow_stream():
+        """Endpoint to stream the Mermaid dataflow diagram text chunk by chunk"""
+        data = request.get_json(silent=True)
+        if not data:
             return jsonify({
-                'dataflow_diagram': result.get('dataflow_diagram'),
-                'component_summary': result.get('component_summary'),
-                'status': 'success'
-            })
-        except Exception as e:
-            logger.error(f"Error in generate_dataflow endpoint: {str(e)}")
+                'error': 'No JSON data provided',
+                'status': 'error'
+            }), 400
+
+        description = data.get('description', '')
+        components = data.get('components', '')
+        if not description:
+            return jsonify({
+                'error': 'No description provided',
+                'status': 'error'
+            }), 400
+
+        logger.info(f"Streaming dataflow diagram for description length {len(description)}")
+        chunks = generate_dataflow_stream_sync(description, components)
+        # Pull the first chunk before answering, so a failure to start (bad input, an open
+        # circuit breaker, the model erroring) still gets a JSON error with a real status code
+        try:
+            first_chunk = next(chunks, '')
+        except ValidationError as e:
             return jsonify({
                 'error': str(e),
                 'status': 'error'
-            }), 500
+            }), 400
+        except Exception as e:
+            logger.error(f"Dataflow stream failed to start: {e}")
+            return jsonify({
+                'error': f"Error generating dataflow diagram: {e}",
+                'status': 'error'
+            }), 503 if isinstance(e, CircuitOpenError) else 502
+
+        def stream():
+            yield first_chunk
+            try:
+                yield from chunks
+            except Exception as e:
+                # The 200 is already sent; end the text with a marker line clients can detect
+                logger.error(f"Dataflow stream failed: {e}")
+                yield f"\n{STREAM_ERROR_MARKER} {e}\n"
+
+        return Response(stream_with_context(stream()), mimetype='text/plain')
 
     # endpoint for sequence diagram generation
     @app.route('/api/generate_sequence', methods=['POST'])
     def generate_sequence():
         """Endpoint to generate sequence diagram"""
-        try:
-            data = request.get_json()
-            if not data:
-                return jsonify({
-                    'error': 'No JSON data provided',
-                    'status': 'error'
-                }), 400
-
-            description = data.get('description', '')
-            actors = data.get('actors', '')
-            if not description:
-                return jsonify({
-                    'error': 'No description provided',
-                    'status': 'error'
-                }), 400
-
-            logger.info(f"Generating sequence diagram for description length {len(description)}")
-            result = generate_sequence_sync(description, actors)
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'error': 'No JSON data provided',
+                'status': 'error'
+            }), 400
 
+        description = data.get('description', '')
+        actors = data.get('actors', '')
+        if not description:
             return jsonify({
-                'sequence_diagram': result.get('sequence_diagram'),
-                'participant_summary': result.get('participant_summary'),
-                'status': 'success'
-            })
-        except Exception as e:
-            logger.error(f"Error in generate_sequence endpoint: {str(e)}")
+                'error': 'No description provided',
+                'status': 'error'
+            }), 400
+
+        logger.info(f"Generating sequence diagram for description length {len(description)}")
+        result = generate_sequence_sync(description, actors)
+        if isinstance(result, Err):
             return jsonify({
-                'error': str(e),
+                'error': result.error,
                 'status': 'error'
-            }), 500
+            }), 502
+        output = result.value
+
+        return jsonify({
+            'sequence_diagram': output.get('sequence_diagram'),
+            'participant_summary': output.get('participant_summary'),
+            'status': 'success'
+        })
 
     # endpoint for color palette diagram generation
     @app.route('/api/generate_palette', methods=['POST'])
     def generate_palette():
         """Endpoint to generate a horizontal color palette diagram (Mermaid flowchart)"""
-        try:
-            data = request.get_json()
-            if not data:
-                return jsonify({
-                    'error': 'No JSON data provided',
-                    'status': 'error'
-                }), 400
-
-            description = data.get('description', '')
-            style_hints = data.get('style_hints', '')
-            if not description:
-                return jsonify({
-                    'error': 'No description provided',
-                    'status': 'error'
-                }), 400
-
-            logger.info(f"Generating palette for description length {len(description)}; hints: {style_hints}")
-            result = generate_palette_sync(description, style_hints)
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'error': 'No JSON data provided',
+                'status': 'error'
+            }), 400
 
+        description = data.get('description', '')
+        style_hints = data.get('style_hints', '')
+        if not description:
             return jsonify({
-                'palette_diagram': result.get('palette_diagram'),
-                'color_summary': result.get('color_summary'),
-                'status': 'success'
-            })
-        except Exception as e:
-            logger.error(f"Error in generate_palette endpoint: {str(e)}")
+                'error': 'No description provided',
+                'status': 'error'
+            }), 400
+
+        logger.info(f"Generating palette for description length {len(description)}; hints: {style_hints}")
+        result = generate_palette_sync(description, style_hints)
+        if isinstance(result, Err):
             return jsonify({
-                'error': str(e),
+                'error': result.error,
                 'status': 'error'
-            }), 500
+            }), 502
+        output = result.value
+
+        return jsonify({
+            'palette_diagram': output.get('palette_diagram'),
+            'color_summary': output.get('color_summary'),
+            'status': 'success'
+        })
 
     # endpoint for microservices architecture generation
     @app.route('/api/generate_microservices', methods=['POST'])
     def generate_microservices():
         """Endpoint to generate microservices architecture diagram"""
-        try:
-            data = request.get_json()
-            if not data:
-                return jsonify({
-                    'error': 'No JSON data provided',
-                    'status': 'error'
-                }), 400
-
-            requirements = data.get('requirements', '')
-            scale = data.get('scale', 'medium')
-            consistency = data.get('consistency', 'eventual')
-            if not requirements:
-                return jsonify({
-                    'error': 'No requirements provided',
-                    'status': 'error'
-                }), 400
-
-            logger.info(f"Generating microservices architecture for requirements length {len(requirements)}; scale={scale}; consistency={consistency}")
-            result = generate_microservices_sync(requirements, scale, consistency)
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'error': 'No JSON data provided',
+                'status': 'error'
+            }), 400
 
+        requirements = data.get('requirements', '')
+        scale = data.get('scale', 'medium')
+        consistency = data.get('consistency', 'eventual')
+        if not requirements:
             return jsonify({
-                'architecture_diagram': result.get('architecture_diagram'),
-                'service_summary': result.get('service_summary'),
-                'status': 'success'
-            })
-        except Exception as e:
-            logger.error(f"Error in generate_microservices endpoint: {str(e)}")
+                'error': 'No requirements provided',
+                'status': 'error'
+            }), 400
+
+        logger.info(f"Generating microservices architecture for requirements length {len(requirements)}; scale={scale}; consistency={consistency}")
+        result = generate_microservices_sync(requirements, scale, consistency)
+        if isinstance(result, Err):
             return jsonify({
-                'error': str(e),
+                'error': result.error,
                 'status': 'error'
-            }), 500
+            }), 502
+        output = result.value
+
+        return jsonify({
+            'architecture_diagram': output.get('architecture_diagram'),
+            'service_summary': output.get('service_summary'),
+            'status': 'success'
+        })
 
     # endpoint for generating SRS documents
     @app.route('/api/generate_srs', methods=['POST'])
     def generate_srs():
         """Endpoint to generate a Software Requirements Specification document"""
-        try:
-            data = request.get_json()
-            if not data:
-                return jsonify({
-                    'error': 'No JSON data provided',
-                    'status': 'error'
-                }), 400
-
-            description = data.get('description', '')
-            requirements = data.get('requirements', '')
-            audience = data.get('audience', '')
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'error': 'No JSON data provided',
+                'status': 'error'
+            }), 400
 
-            if not description:
-                return jsonify({
-                    'error': 'description is required',
-                    'status': 'error'
-                }), 400
+        description = data.get('description', '')
+        requirements = data.get('requirements', '')
+        audience = data.get('audience', '')
 
-            logger.info(f"Generating SRS for description length {len(description)}")
-            result = generate_srs_sync(description, requirements, audience)
+        if not description:
+            return jsonify({
+                'error': 'description is required',
+                'status': 'error'
+            }), 400
 
+        logger.info(f"Generating SRS for description length {len(description)}")
+        result = generate_srs_sync(description, requirements, audience)
+        if isinstance(result, Err):
             return jsonify({
-                'srs_document': result.get('srs_document'),
-                'srs_summary': result.get('srs_summary'),
-                'status': 'success'
-            })
-        except Exception as e:
-            logger.error(f"Error in generate_srs endpoint: {str(e)}")
-            return
-    
+                'error': result.error,
+                'status': 'error'
+            }), 502
+        output = result.value
+
+        return jsonify({
+            'srs_document': output.get('srs_document'),
+            'srs_summary': output.get('srs_summary'),
+            'status': 'success'
+        })
+
     # endpoint for generating screen mockups
     @app.route('/api/generate_mockups', methods=['POST'])
     def generate_mockups():
         """Endpoint to generate screen mockups for applications"""
-        try:
-            data = request.get_json()
-            if not data:
-                return jsonify({
-                    'message': 'No data provided',
-                    'status': 'error'
-                }), 400
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'message': 'No data provided',
+                'status': 'error'
+            }), 400
 
-            description = data.get('description', '')
-            design_preferences = data.get('design_preferences', '')
-            screens = data.get('screens', '')
+        description = data.get('description', '')
+        design_preferences = data.get('design_preferences', '')
+        screens = data.get('screens', '')
 
-            if not description:
-                return jsonify({
-                    'message': 'Description is required',
-                    'status': 'error'
-                }), 400
+        if not description:
+            return jsonify({
+                'message': 'Description is required',
+                'status': 'error'
+            }), 400
 
-            logger.info(f"Generating mockups for description length {len(description)}")
-            result = generate_mockups_sync(description, design_preferences, screens)
-            
-            # Debug log the result
-            logger.info(f"Mockups generation result: {result}")
+        logger.info(f"Generating mockups for description length {len(description)}")
+        result = generate_mockups_sync(description, design_preferences, screens)
+        if isinstance(result, Err):
+            return jsonify({
+                'message': result.error,
+                'status': 'error'
+            }), 502
+        output = result.value
 
+        # Debug log the result
+        logger.info(f"Mockups generation result: {output}")
+
+        return jsonify({
+            'mockups_data': output.get('mockups_data'),
+            'design_summary': output.get('design_summary'),
+            'status': 'success'
+        })
+
+    # endpoint for running every agent at once
+    @app.route('/api/generate_all', methods=['POST'])
+    def generate_all():
+        """Endpoint to run all documentation agents concurrently for one description"""
+        data = request.get_json()
+        if not data:
             return jsonify({
-                'mockups_data': result.get('mockups_data'),
-                'design_summary': result.get('design_summary'),
-                'status': 'success'
-            })
-        except Exception as e:
-            logger.error(f"Error in generate_mockups endpoint: {str(e)}")
+                'error': 'No JSON data provided',
+                'status': 'error'
+            }), 400
+
+        description = data.get('description', '')
+        if not description:
             return jsonify({
-                'message': f'Error generating mockups: {str(e)}',
+                'error': 'description is required',
                 'status': 'error'
-            }), 500
-    
+            }), 400
+
+        logger.info(f"Generating all documents for description length {len(description)}")
+        # Like the single-agent endpoints, only the known inputs are read; other keys are ignored
+        results = generate_all_sync(
+            description,
+            table_definitions=data.get('table_definitions'),
+            requirements=data.get('requirements', ''),
+            components=data.get('components', ''),
+            actors=data.get('actors', ''),
+            style_hints=data.get('style_hints', ''),
+            design_preferences=data.get('design_preferences', ''),
+            screens=data.get('screens', ''),
+            audience=data.get('audience', ''),
+            technology_stack=data.get('technology_stack', ''),
+            deployment_type=data.get('deployment_type', 'web'),
+            scale=data.get('scale', 'medium'),
+            consistency=data.get('consistency', 'eventual'),
+        )
+
+        return jsonify({
+            'results': {
+                name: {'error': result.error} if isinstance(result, Err) else result.value
+                for name, result in results.items()
+            },
+            'status': 'success'
+        })
+
     @app.route('/api/export/pdf', methods=['POST', 'OPTIONS'])
     def export_pdf():
         """Export document as PDF file"""
@@ -422,12 +582,11 @@ def create_app(config_name=None):
             
             content = data['content']
             filename = data.get('filename', 'technical-document.pdf')
-            session_id = data.get('session_id')  # Optional session ID for user isolation
             
             # Generate PDF with better error handling
             try:
                 pdf_gen = PDFGenerator()
-                pdf_buffer = pdf_gen.generate_pdf(content, filename, session_id)
+                pdf_buffer = pdf_gen.generate_pdf(content, filename)
                 
                 return app.response_class(
                     pdf_buffer.getvalue(),
@@ -8,59 +8,97 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Regex patterns for markdown elements, compiled once for every parser
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.+)$', re.MULTILINE)
+_TABLE_RE = re.compile(r'^\|(.+\|)+\s*$', re.MULTILINE)
+_TABLE_SEPARATOR_RE = re.compile(r'^\|[\s\-\|:]+\|?\s*$', re.MULTILINE)
+_MERMAID_RE = re.compile(r'```mermaid\n(.*?)\n```', re.DOTALL)
+_CODE_BLOCK_RE = re.compile(r'```(\w+)?\n(.*?)\n```', re.DOTALL)
+_SEP_CELL_RE = re.compile(r'^[\-:]+$')
+_BOLD_RE = re.compile(r'\*\*(.*?)\*\*')
+_ITALIC_RE = re.compile(r'\*(.*?)\*')
+_CODE_RE = re.compile(r'`(.*?)`')
+_PUNCT_STRIP_RE = re.compile(r'[^a-z0-9\s\-]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_HYPHEN_COLLAPSE_RE = re.compile(r'-{2,}')
+
+# ASCII heading slug table: whitespace -> '-', keep [a-z0-9-], drop everything else
+_SLUG_TABLE = {
+    code: '-' if chr(code).isspace() else None
+    for code in range(128)
+    if not (chr(code).islower() or chr(code).isdigit() or chr(code) == '-')
+}
+
 class MarkdownParser:
     """Parse markdown content and extract structure for TOC generation"""
     
+    # A level-1 heading containing any of these is the document title, not a TOC entry
+    _TITLE_WORDS = ('technical', 'design', 'document', 'title')
+    
     def __init__(self):
-        # Regex patterns for markdown elements
-        self.heading_pattern = re.compile(r'^(#{1,6})\s+(.+)$', re.MULTILINE)
-        self.table_pattern = re.compile(r'^\|(.+\|)+\s*$', re.MULTILINE)
-        self.table_separator_pattern = re.compile(r'^\|[\s\-\|:]+\|?\s*$', re.MULTILINE)
-        self.mermaid_pattern = re.compile(r'```mermaid\n(.*?)\n```', re.DOTALL)
-        self.code_block_pattern = re.compile(r'```(\w+)?\n(.*?)\n```', re.DOTALL)
-        
-    def extract_headings(self, content: str) -> List[Dict[str, any]]:
-        """Extract all headings from markdown content with their levels and positions"""
+        # Regex patterns for markdown elements (shared module-level patterns)
+        self.heading_pattern = _HEADING_RE
+        self.table_pattern = _TABLE_RE
+        self.table_separator_pattern = _TABLE_SEPARATOR_RE
+        self.mermaid_pattern = _MERMAID_RE
+        self.code_block_pattern = _CODE_BLOCK_RE
+        
+    def _scan_headings(self, content: str) -> List[Tuple[int, str]]:
+        """Find (level, title) for every heading, with the same matches as heading_pattern"""
         headings = []
         
-        for match in self.heading_pattern.finditer(content):
-            level = len(match.group(1))  # Count the # symbols
-            title = match.group(2).strip()
-            position = match.start()
-            
-            # Create anchor-friendly ID
-            heading_id = self._create_heading_id(title)
-            
-            headings.append({
-                'level': level,
-                'title': title,
-                'id': heading_id,
-                'position': position
-            })
+        for line in content.split('\n'):
+            # Most lines are rejected by their first character
+            if line[:1] != '#':
+                continue
+            level = len(line) - len(line.lstrip('#'))  # Count the # symbols
+            if level > 6:
+                continue
+            rest = line[level:]
+            title = rest.strip()
+            if not title:
+                if not rest or rest[0].isspace():
+                    # "#" with nothing after it on the line: the pattern's \s+ can run on
+                    # into the following lines, so let the regex handle this document
+                    return [(len(m.group(1)), m.group(2).strip()) for m in self.heading_pattern.finditer(content)]
+                continue
+            if rest[0].isspace():
+                headings.append((level, title))
         
         return headings
     
+    def extract_headings(self, content: str) -> List[Dict[str, any]]:
+        """Extract all headings from markdown content with their levels"""
+        return [
+            {
+                'level': level,
+                'title': title,
+                'id': self._create_heading_id(title)  # Anchor-friendly ID
+            }
+            for level, title in self._scan_headings(content)
+        ]
+    
     def generate_toc_markdown(self, content: str) -> str:
         """Generate table of contents in markdown format"""
-        headings = self.extract_headings(content)
-        
-        if not headings:
-            return ""
-        
         toc_lines = ["# Table of Contents\n"]
+        title_words = self._TITLE_WORDS
+        has_headings = False
         
-        for heading in headings:
-            # Skip the main title if it exists
-            if heading['level'] == 1 and any(word in heading['title'].lower() 
-                                           for word in ['technical', 'design', 'document', 'title']):
-                continue
+        # Emit TOC lines straight from the heading scan, without building heading dicts first
+        for level, title in self._scan_headings(content):
+            has_headings = True
             
-            # Create indentation based on heading level (start from level 1)
-            indent = "  " * (heading['level'] - 1)
+            # Skip the main title if it exists
+            if level == 1:
+                title_lower = title.lower()
+                if any(word in title_lower for word in title_words):
+                    continue
             
-            # Create markdown link
-            toc_line = f"{indent}- [{heading['title']}](#{heading['id']})"
-            toc_lines.append(toc_line)
+            # Create indentation based on heading level (start from level 1), and the markdown link
+            toc_lines.append(f"{'  ' * (level - 1)}- [{title}](#{self._create_heading_id(title)})")
+        
+        if not has_headings:
+            return ""
         
         return "\n".join(toc_lines) + "\n"
     
@@ -83,11 +121,7 @@ class MarkdownParser:
                     break
             
             # Insert TOC with proper spacing
-            lines.insert(insert_position, "")
-            lines.insert(insert_position + 1, toc.strip())
-            lines.insert(insert_position + 2, "")
-            
-            return '\n'.join(lines)
+            return '\n'.join(lines[:insert_position] + ["", toc.strip(), ""] + lines[insert_position:])
         
         elif position == "beginning":
             return toc + "\n" + content
@@ -96,36 +130,52 @@ class MarkdownParser:
             return content + "\n" + toc
     
     def parse_markdown_tables(self, content: str) -> List[Dict[str, any]]:
-        """Parse markdown tables and extract structured data"""
+        """Parse markdown tables and extract structured data
+        
+        Each table also records 'start' and 'end', the character offsets of its markdown in content,
+        so callers can splice it out without rebuilding the text.
+        """
         tables = []
         lines = content.split('\n')
         
+        # Character offset of the start of each line
+        offsets = []
+        position = 0
+        for line in lines:
+            offsets.append(position)
+            position += len(line) + 1
+        
         i = 0
         while i < len(lines):
             line = lines[i].strip()
             
             # Check if this line starts a table
             if self._is_table_row(line):
+                first_line = i
                 table_data = []
                 headers = self._parse_table_row(line)
                 table_data.append(headers)
                 i += 1
                 
                 # Skip separator row if present
-                if i < len(lines) and self._is_table_separator(lines[i]):
+                if i < len(lines) and self._is_table_separator(lines[i].strip()):
                     i += 1
                 
                 # Parse table rows
-                while i < len(lines) and self._is_table_row(lines[i].strip()):
-                    row = self._parse_table_row(lines[i].strip())
-                    table_data.append(row)
+                while i < len(lines):
+                    row_line = lines[i].strip()
+                    if not self._is_table_row(row_line):
+                        break
+                    table_data.append(self._parse_table_row(row_line))
                     i += 1
                 
                 if len(table_data) >= 2:  # Has headers and at least one row
                     tables.append({
                         'headers': table_data[0],
                         'rows': table_data[1:],
-                        'raw_data': table_data
+                        'raw_data': table_data,
+                        'start': offsets[first_line],
+                        'end': offsets[i - 1] + len(lines[i - 1])
                     })
             else:
                 i += 1
@@ -137,14 +187,19 @@ class MarkdownParser:
         # Convert to lowercase and replace spaces with hyphens
         heading_id = title.lower()
         
+        if heading_id.isascii():
+            # Fast path: one translate pass does the removal and the whitespace replacement
+            heading_id = _HYPHEN_COLLAPSE_RE.sub('-', heading_id.translate(_SLUG_TABLE)).strip('-')
+            return heading_id or 'heading'
+        
         # Remove special characters except hyphens and alphanumeric
-        heading_id = re.sub(r'[^a-z0-9\s\-]', '', heading_id)
+        heading_id = _PUNCT_STRIP_RE.sub('', heading_id)
         
         # Replace spaces with hyphens
-        heading_id = re.sub(r'\s+', '-', heading_id)
+        heading_id = _WHITESPACE_RE.sub('-', heading_id)
         
         # Remove multiple consecutive hyphens
-        heading_id = re.sub(r'-+', '-', heading_id)
+        heading_id = _HYPHEN_COLLAPSE_RE.sub('-', heading_id)
         
         # Remove leading/trailing hyphens
         heading_id = heading_id.strip('-')
@@ -152,12 +207,11 @@ class MarkdownParser:
         return heading_id or 'heading'
     
     def _is_table_row(self, line: str) -> bool:
-        """Check if a line is a markdown table row"""
-        return line.startswith('|') and line.endswith('|') and '|' in line[1:-1]
+        """Check if a (stripped) line is a markdown table row"""
+        return line.startswith('|') and line.endswith('|') and line.find('|', 1, -1) != -1
     
     def _is_table_separator(self, line: str) -> bool:
-        """Check if a line is a markdown table separator (header separator)"""
-        line = line.strip()
+        """Check if a line is a markdown table separator (header separator); callers pass it already stripped"""
         if not (line.startswith('|') and line.endswith('|')):
             return False
         
@@ -167,7 +221,7 @@ class MarkdownParser:
         
         for cell in cells:
             cell = cell.strip()
-            if not re.match(r'^[\-:]+$', cell):
+            if not _SEP_CELL_RE.match(cell):
                 return False
         
         return True
@@ -185,41 +239,42 @@ class MarkdownParser:
     
     def clean_markdown_for_pdf(self, content: str) -> str:
         """Clean markdown content for better PDF rendering"""
-        lines = content.split('\n')
         cleaned_lines = []
-        
-        in_table = False
-        table_buffer = []
-        
-        for line in lines:
-            stripped_line = line.strip()
+        append = cleaned_lines.append
+        is_table_row = self._is_table_row
+        is_table_separator = self._is_table_separator
+        
+        table_buffer = None  # raw lines of the table being collected, None outside a table
+        
+        for line in content.split('\n'):
+            # Only lines containing a pipe can be table rows or separators
+            if '|' in line:
+                stripped_line = line.strip()
+                if stripped_line[:1] == '|':
+                    # Handle tables specially
+                    if is_table_row(stripped_line):
+                        if table_buffer is None:
+                            table_buffer = []
+                        table_buffer.append(line)
+                        continue
+                    if is_table_separator(stripped_line):
+                        if table_buffer is not None:
+                            table_buffer.append(line)
+                        continue
             
-            # Handle tables specially
-            if self._is_table_row(stripped_line):
-                if not in_table:
-                    in_table = True
-                    table_buffer = []
-                table_buffer.append(line)
-            elif self._is_table_separator(stripped_line):
-                if in_table:
-                    table_buffer.append(line)
-            else:
-                # End of table or not a table line
-                if in_table:
-                    # Process the table buffer
-                    cleaned_table = self._clean_table_markdown(table_buffer)
-                    cleaned_lines.extend(cleaned_table)
-                    in_table = False
-                    table_buffer = []
-                
-                # Clean other markdown elements
-                cleaned_line = self._clean_markdown_line(line)
-                cleaned_lines.append(cleaned_line)
+            # End of table or not a table line
+            if table_buffer is not None:
+                cleaned_lines.extend(self._clean_table_markdown(table_buffer))
+                table_buffer = None
+            
+            # Clean other markdown elements (only lines with markup need the regexes)
+            if '*' in line or '`' in line:
+                line = self._clean_markdown_line(line)
+            append(line)
         
         # Handle any remaining table
-        if in_table and table_buffer:
-            cleaned_table = self._clean_table_markdown(table_buffer)
-            cleaned_lines.extend(cleaned_table)
+        if table_buffer:
+            cleaned_lines.extend(self._clean_table_markdown(table_buffer))
         
         return '\n'.join(cleaned_lines)
     
@@ -233,12 +288,13 @@ class MarkdownParser:
         has_separator = False
         
         for line in table_lines:
-            if self._is_table_separator(line.strip()):
+            line = line.strip()
+            if self._is_table_separator(line):
                 has_separator = True
                 continue
             
-            if self._is_table_row(line.strip()):
-                row = self._parse_table_row(line.strip())
+            if self._is_table_row(line):
+                row = self._parse_table_row(line)
                 table_data.append(row)
         
         if not table_data:
@@ -270,23 +326,20 @@ class MarkdownParser:
     def _clean_markdown_line(self, line: str) -> str:
         """Clean individual markdown line"""
         # Fix bold markdown
-        line = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', line)
+        line = _BOLD_RE.sub(r'<b>\1</b>', line)
         
         # Fix italic markdown
-        line = re.sub(r'\*(.*?)\*', r'<i>\1</i>', line)
+        line = _ITALIC_RE.sub(r'<i>\1</i>', line)
         
         # Fix inline code
-        line = re.sub(r'`(.*?)`', r'<code>\1</code>', line)
+        line = _CODE_RE.sub(r'<code>\1</code>', line)
         
         return line
 
 
-# Global parser instance
-_markdown_parser = None
+# Global parser instance (stateless, so one shared instance is built at import)
+_markdown_parser = MarkdownParser()
 
 def get_markdown_parser() -> MarkdownParser:
-    """Get or create global markdown parser instance"""
-    global _markdown_parser
-    if _markdown_parser is None:
-        _markdown_parser = MarkdownParser()
-    return _markdown_parser
\ No newline at end of file
+    """Get the global markdown parser instance"""
+    return _markdown_parser
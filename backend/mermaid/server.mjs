@@ -0,0 +1,96 @@
+// Long-lived Mermaid renderer for pdf_generator.py (see mermaid_worker.py).
+//
+// Protocol, one JSON object per line:
+//   stdout: {"ready": true} once the renderer has loaded
+//   stdin:  {"id": 1, "code": "graph TD; A --> B", "png": false}
+//   stdout: {"id": 1, "svg": "<svg ..."}, {"id": 1, "png": "<base64>"} or {"id": 1, "error": "..."}
+// Replies can arrive out of order; the id ties them to their request.
+// The process exits once stdin is closed and the renders in flight have been answered.
+
+import { createInterface } from 'node:readline';
+import { renderMermaid } from 'beautiful-mermaid';
+
+// Matches the PDF palette: white page, dark slate text
+const THEME = { bg: '#ffffff', fg: '#2d3748' };
+
+// Diagram types beautiful-mermaid doesn't handle (and requests for a PNG) go to mermaid-isomorphic,
+// which renders with the full Mermaid library in headless Chromium. It is loaded on first use, and
+// requests arriving within BATCH_WINDOW_MS of each other share one render call, so a document's
+// diagrams start the browser once instead of once each.
+const BATCH_WINDOW_MS = 20;
+// Chromium flags come from mermaid_worker.py (CHROMIUM_ARGS, the base set mmdc also uses)
+const CHROMIUM_ARGS = (process.env.MERMAID_CHROMIUM_ARGS ?? '--no-sandbox --disable-dev-shm-usage')
+  .split(' ')
+  .filter(Boolean);
+
+let browserRenderer = null;
+let batch = [];
+
+async function getBrowserRenderer() {
+  if (!browserRenderer) {
+    const { createMermaidRenderer } = await import('mermaid-isomorphic');
+    browserRenderer = createMermaidRenderer({
+      launchOptions: {
+        executablePath: process.env.PUPPETEER_EXECUTABLE_PATH || undefined,
+        args: CHROMIUM_ARGS,
+      },
+    });
+  }
+  return browserRenderer;
+}
+
+async function flushBatch() {
+  const jobs = batch;
+  batch = [];
+  try {
+    const render = await getBrowserRenderer();
+    const results = await render(jobs.map((job) => job.code), {
+      screenshot: true,
+      mermaidConfig: { theme: 'neutral' },
+    });
+    results.forEach((result, i) => {
+      if (result.status === 'fulfilled') jobs[i].resolve(result.value.screenshot);
+      else jobs[i].reject(result.reason);
+    });
+  } catch (error) {
+    for (const job of jobs) job.reject(error);
+  }
+}
+
+function renderPng(code) {
+  return new Promise((resolve, reject) => {
+    batch.push({ code, resolve, reject });
+    if (batch.length === 1) setTimeout(flushBatch, BATCH_WINDOW_MS);
+  });
+}
+
+function reply(message) {
+  process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+async function handle(line) {
+  let id = null;
+  try {
+    const request = JSON.parse(line);
+    id = request.id;
+    if (!request.png) {
+      try {
+        reply({ id, svg: await renderMermaid(request.code, THEME) });
+        return;
+      } catch {
+        // Unsupported diagram type (or bad source, which the browser will report too)
+      }
+    }
+    const screenshot = await renderPng(request.code);
+    reply({ id, png: Buffer.from(screenshot).toString('base64') });
+  } catch (error) {
+    reply({ id, error: String(error?.message ?? error) });
+  }
+}
+
+const lines = createInterface({ input: process.stdin });
+lines.on('line', (line) => {
+  if (line.trim()) handle(line);
+});
+
+reply({ ready: true });
@@ -0,0 +1,257 @@
+"""
+Persistent Node processes that render Mermaid diagrams (mermaid/server.mjs)
+
+A small pool of workers is started on demand and shared by every PDF export, so a diagram
+costs a JSON line round trip instead of a headless browser launch. Most diagrams come back
+as SVG; types only the full Mermaid library supports are rendered to PNG in a browser each
+worker shares between the diagrams it receives together.
+"""
+
+import atexit
+import base64
+import collections
+import itertools
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WORKER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mermaid')
+SERVER_SCRIPT = os.path.join(WORKER_DIR, 'server.mjs')
+# Scratch space for renders (Chromium's profile and crash dumps, mmdc input files): RAM-backed
+# /dev/shm where there is one, so none of it reaches the disk
+MERMAID_TMPDIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+# Flags for every headless Chromium used for diagrams (the worker's browser renderer and mmdc).
+# Beyond the usual container flags, these skip the crash reporter processes and the
+# site-isolation renderers. The worker's browser stays up across many renders, so it keeps
+# Chromium's normal multi-process model; mmdc adds --single-process on top (see pdf_generator).
+CHROMIUM_ARGS = (
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-crash-reporter',
+    '--disable-breakpad',
+    '--disable-software-rasterizer',
+    '--font-render-hinting=none',
+    '--disable-features=site-per-process,TranslateUI',
+)
+
+# The npm packages that do the rendering; their versions identify the worker's output
+RENDER_PACKAGES = ('beautiful-mermaid', 'mermaid-isomorphic')
+
+STARTUP_TIMEOUT = 15
+STDERR_TAIL_LINES = 20  # most recent stderr lines kept for error messages
+RENDER_TIMEOUT = 60  # the browser path can include a Chromium launch
+
+
+class MermaidRenderError(Exception):
+    """The worker couldn't render a diagram: bad source, a timeout, or the worker went away"""
+
+
+class MermaidWorker:
+    """One Node renderer process; replies are matched to requests by id, so threads can share it"""
+
+    def __init__(self):
+        self._process = subprocess.Popen(
+            ['node', SERVER_SCRIPT],
+            cwd=WORKER_DIR,
+            env={**os.environ, 'TMPDIR': MERMAID_TMPDIR, 'MERMAID_CHROMIUM_ARGS': ' '.join(CHROMIUM_ARGS)},
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            bufsize=1,
+        )
+        self._pending = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()  # set on the ready line, or when the worker exits first
+        self._started = False
+        self._stderr_tail = collections.deque(maxlen=STDERR_TAIL_LINES)
+        threading.Thread(target=self._read_replies, name='mermaid-worker-reader', daemon=True).start()
+        self._stderr_reader = threading.Thread(target=self._read_stderr, name='mermaid-worker-stderr', daemon=True)
+        self._stderr_reader.start()
+
+        if not self._ready.wait(STARTUP_TIMEOUT) or not self._started:
+            self.close()
+            raise MermaidRenderError(f"Mermaid worker did not start{self._stderr_summary()}")
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    @property
+    def pending(self) -> int:
+        """Number of requests sent and not yet answered"""
+        return len(self._pending)
+
+    def _read_stderr(self):
+        """Keep the tail of the worker's stderr (Node errors, Chromium launch failures) for error messages"""
+        for line in self._process.stderr:
+            line = line.rstrip()
+            if line:
+                self._stderr_tail.append(line)
+                logger.debug(f"Mermaid worker stderr: {line}")
+
+    def _stderr_summary(self) -> str:
+        """': <last stderr lines>' to append to an error message, or '' if there were none"""
+        if not self.alive:
+            self._stderr_reader.join(1)  # let it take in what the process wrote before exiting
+        if not self._stderr_tail:
+            return ""
+        return ": " + " | ".join(self._stderr_tail)
+
+    def _read_replies(self):
+        for line in self._process.stdout:
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                logger.warning(f"Unexpected output from Mermaid worker: {line.strip()[:200]}")
+                continue
+
+            if reply.get('ready'):
+                self._started = True
+                self._ready.set()
+                continue
+
+            with self._lock:
+                future = self._pending.pop(reply.get('id'), None)
+            if future is None:
+                continue  # the caller already gave up on it
+            if 'svg' in reply:
+                future.set_result(('svg', reply['svg'].encode('utf-8')))
+            elif 'png' in reply:
+                future.set_result(('png', base64.b64decode(reply['png'])))
+            else:
+                future.set_exception(MermaidRenderError(reply.get('error') or "Mermaid render failed"))
+
+        # stdout closed: the process has exited, so nothing else will be answered
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        self._ready.set()
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(MermaidRenderError(f"Mermaid worker exited{self._stderr_summary()}"))
+
+    def render(self, code: str, png: bool = False, timeout: float = RENDER_TIMEOUT) -> Tuple[str, bytes]:
+        """
+        Render Mermaid source, raising MermaidRenderError on failure
+        
+        Args:
+            code: Mermaid diagram source
+            png: Ask for a PNG even if the diagram could be rendered as SVG
+            timeout: Seconds to wait for the reply
+        
+        Returns:
+            Tuple[str, bytes]: ('svg', document) or ('png', image data)
+        """
+        future = Future()
+        with self._lock:
+            if not self.alive:
+                raise MermaidRenderError("Mermaid worker is not running")
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                self._process.stdin.write(json.dumps({'id': request_id, 'code': code, 'png': png}) + '\n')
+                self._process.stdin.flush()
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                raise MermaidRenderError(f"Mermaid worker pipe closed: {e}") from e
+
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise MermaidRenderError(f"Mermaid render timed out after {timeout}s")
+
+    def close(self):
+        """Close stdin so the worker finishes what it has and exits; kill it if it doesn't"""
+        if not self.alive:
+            return
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+
+
+def get_worker_version() -> Optional[str]:
+    """Versions of the installed render packages, e.g. 'beautiful-mermaid@0.1.0 mermaid-isomorphic@3.0.4';
+    None if the worker can't run here (no node, or the packages aren't installed)"""
+    if shutil.which('node') is None or not os.path.exists(SERVER_SCRIPT):
+        return None
+    versions = []
+    for package in RENDER_PACKAGES:
+        try:
+            with open(os.path.join(WORKER_DIR, 'node_modules', package, 'package.json'), encoding='utf-8') as f:
+                versions.append(f"{package}@{json.load(f)['version']}")
+        except (OSError, ValueError, KeyError):
+            return None
+    return ' '.join(versions)
+
+
+# Each Node process renders one diagram at a time, so a few of them let a document's diagrams
+# render in parallel
+POOL_SIZE = min(4, os.cpu_count() or 1)
+
+_workers: List[MermaidWorker] = []
+_workers_lock = threading.Lock()
+_worker_unavailable = False  # set once starting fails, so exports don't retry it per diagram
+
+
+def get_mermaid_worker() -> Optional[MermaidWorker]:
+    """
+    Get the least busy worker in the pool; None if workers can't run here
+    
+    Workers are started on demand, one more whenever every running worker is busy (up to
+    POOL_SIZE), and crashed ones are replaced.
+    """
+    global _worker_unavailable
+
+    with _workers_lock:
+        _workers[:] = [worker for worker in _workers if worker.alive]
+        idlest = min(_workers, key=lambda worker: worker.pending, default=None)
+        if idlest is not None and (idlest.pending == 0 or len(_workers) >= POOL_SIZE):
+            return idlest
+        if _worker_unavailable:
+            return idlest
+
+        if shutil.which('node') is None or not os.path.exists(SERVER_SCRIPT):
+            logger.warning("node or the Mermaid worker script is missing; using mmdc for diagrams")
+            _worker_unavailable = True
+            return None
+
+        try:
+            worker = MermaidWorker()
+        except (OSError, MermaidRenderError) as e:
+            logger.warning(f"Could not start Mermaid worker, using mmdc for diagrams: {e}")
+            _worker_unavailable = True
+            return idlest
+
+        _workers.append(worker)
+        logger.info(f"Started Mermaid worker {len(_workers)}/{POOL_SIZE}")
+        return worker
+
+
+@atexit.register
+def _shutdown_workers():
+    for worker in _workers:
+        worker.close()
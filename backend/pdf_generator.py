@@ -6,15 +6,32 @@ import os
 import tempfile
 import subprocess
 import logging
+import hashlib
+import functools
+import copy
+import signal
+import threading
+import time
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Optional, Tuple, List, Dict
 import re
+import struct
+import zlib
 import markdown2
-from datetime import datetime
+from datetime import date
 import json
+from reportlab import rl_config
+
+# Skip ReportLab's attribute validation on shapes unless PDF_DEBUG is set. It's read when
+# reportlab.graphics is first imported, so this has to run before the imports below.
+if not os.environ.get('PDF_DEBUG'):
+    rl_config.shapeChecking = 0
+
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, 
+    BaseDocTemplate, PageTemplate, Frame, Paragraph, Spacer, Image, PageBreak, 
     Table, TableStyle, KeepTogether, Flowable
 )
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -22,69 +39,367 @@ from reportlab.lib.units import inch, mm
 from reportlab.lib.colors import HexColor, Color
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT, TA_JUSTIFY
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.lib import colors
 from PIL import Image as PILImage
 from markdown_utils import get_markdown_parser
+from mermaid_worker import CHROMIUM_ARGS, MERMAID_TMPDIR, POOL_SIZE as MERMAID_POOL_SIZE, MermaidRenderError, get_mermaid_worker, get_worker_version
+
+try:
+    import cairosvg
+except (ImportError, OSError):  # OSError: the system cairo library is missing
+    cairosvg = None
+
+try:
+    from svglib.svglib import svg2rlg
+except ImportError:
+    svg2rlg = None
 
 logger = logging.getLogger(__name__)
 
-# Check if mmdc (Mermaid CLI) is available
+# Regex patterns used while building the story, compiled once at import
+_MERMAID_RE = re.compile(r'```\s*mermaid\s*\n(.*?)\n\s*```', re.DOTALL | re.IGNORECASE)
+_NUMLIST_RE = re.compile(r'^\d+\.\s')
+_SECTION_BREAK_RE = re.compile(r'\n\n+')
+# Inline markdown, one alternative per construct; each named group captures the inner text
+_INLINE_RE = re.compile(
+    r'\*\*(?P<bold>.+?)\*\*'
+    r'|`(?P<code>[^`]+)`'
+    r'|(?<!\*)\*(?P<italic>[^*]+)\*(?!\*)'
+    r'|\[(?P<link>[^\]]+)\]\([^)]+\)'
+    r'|~~(?P<strike>.+?)~~'
+)
+# Characters that can start one of the constructs above
+_MARKDOWN_CHARS = frozenset('*`[~')
+# Table cells with any of these need a Paragraph (inline markdown or Paragraph markup/entities)
+_CELL_MARKUP_CHARS = _MARKDOWN_CHARS | frozenset('<&')
+
+# Palette, parsed once and shared by the styles, tables and page decorations
+_COLOR_CYAN = HexColor('#22D3EE')
+_COLOR_SLATE = HexColor('#2d3748')
+_COLOR_TEXT = HexColor('#4a5568')
+_COLOR_MUTED = HexColor('#666666')
+_COLOR_GRID = HexColor('#e2e8f0')
+_COLOR_ROW = HexColor('#f8f9fa')
+_COLOR_WHITE = HexColor('#ffffff')
+
+def _iter_sections(text: str):
+    """Yield the blank-line separated sections of text, without building a list of them"""
+    start = 0
+    for match_obj in _SECTION_BREAK_RE.finditer(text):
+        yield text[start:match_obj.start()]
+        start = match_obj.end()
+    yield text[start:]
+
+# Check if mmdc (Mermaid CLI) is available. The probe starts Node, so it runs on the first
+# document with a diagram rather than at import, and its answer is kept on disk for a day
+# so restarts and reloads skip it.
+_MMDC_PROBE_CACHE = Path(tempfile.gettempdir()) / "mmdc_available.json"
+MMDC_PROBE_TTL = 24 * 3600
+MMDC_PROBE_TIMEOUT = 5
+# A render normally takes a few seconds; one that runs this long has hung its browser
+MMDC_TIMEOUT = 25
+
+_mmdc_probe_lock = threading.Lock()
+_mmdc_probed = False
+_mmdc_version = None
+
+def _probe_mmdc_version() -> Optional[str]:
+    """Run mmdc --version; raises subprocess.TimeoutExpired if it doesn't answer in time"""
+    try:
+        result = subprocess.run(['mmdc', '--version'], check=True, capture_output=True, text=True,
+                                timeout=MMDC_PROBE_TIMEOUT)
+        return result.stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+def _load_mmdc_probe() -> Tuple[bool, Optional[str]]:
+    """(True, version) from a fresh on-disk probe result, else (False, None)"""
+    try:
+        if time.time() - _MMDC_PROBE_CACHE.stat().st_mtime < MMDC_PROBE_TTL:
+            return True, json.loads(_MMDC_PROBE_CACHE.read_text())['version']
+    except (OSError, ValueError, KeyError):
+        pass
+    return False, None
+
+def _save_mmdc_probe(version: Optional[str]) -> None:
+    try:
+        with tempfile.NamedTemporaryFile('w', dir=_MMDC_PROBE_CACHE.parent, suffix='.json', delete=False) as f:
+            json.dump({'version': version}, f)
+        os.replace(f.name, _MMDC_PROBE_CACHE)
+    except OSError as e:
+        logger.warning(f"Could not cache the mmdc check: {e}")
+
+def get_mmdc_version() -> Optional[str]:
+    """Get the installed mmdc CLI version, or None if it isn't available"""
+    global _mmdc_probed, _mmdc_version
+    with _mmdc_probe_lock:
+        if _mmdc_probed:
+            return _mmdc_version
+        
+        found, version = _load_mmdc_probe()
+        if not found:
+            try:
+                version = _probe_mmdc_version()
+            except subprocess.TimeoutExpired:
+                # Treat mmdc as unavailable for the rest of this process, so later diagrams don't
+                # each wait out the probe again; not saved to disk, so a restart checks again
+                logger.warning(f"mmdc --version timed out after {MMDC_PROBE_TIMEOUT}s; not using mmdc")
+                _mmdc_probed, _mmdc_version = True, None
+                return None
+            _save_mmdc_probe(version)
+        
+        if version is not None:
+            logger.info("mmdc CLI is available for Mermaid diagram generation")
+        else:
+            logger.warning("mmdc CLI not found - install with: npm install -g @mermaid-js/mermaid-cli")
+        _mmdc_probed, _mmdc_version = True, version
+        return version
+
 def check_mmdc_available():
     """Check if mmdc CLI tool is available"""
+    return get_mmdc_version() is not None
+
+# mmdc's Chromium renders one diagram and exits, so it also skips the zygote and runs in a
+# single process. Those flags are only safe for a throwaway browser, not the worker's.
+_MMDC_CHROMIUM_ARGS = CHROMIUM_ARGS + ('--single-process', '--no-zygote')
+
+def _write_puppeteer_config() -> Optional[str]:
+    """Write the Puppeteer launch options mmdc uses when the image ships no config; returns its path"""
+    config = {
+        'headless': 'new',
+        'pipe': True,  # talk to Chromium over a pipe instead of a WebSocket
+        'executablePath': '/usr/bin/chromium-browser',
+        'args': list(_MMDC_CHROMIUM_ARGS),
+    }
+    path = Path(tempfile.gettempdir()) / 'mmdc-puppeteer-config.json'
     try:
-        subprocess.run(['mmdc', '--version'], check=True, capture_output=True)
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return False
+        with tempfile.NamedTemporaryFile('w', dir=path.parent, suffix='.json', delete=False) as f:
+            json.dump(config, f)
+        os.replace(f.name, path)
+    except OSError as e:
+        logger.warning(f"Could not write a puppeteer config, using mmdc defaults: {e}")
+        return None
+    logger.info(f"Using generated puppeteer config file: {path}")
+    return str(path)
+
+# Environment for every mmdc run, built once at import rather than copied per diagram.
+# Ensure Puppeteer environment variables are passed to subprocess
+_MMDC_CHROMIUM_FLAGS = ' '.join(_MMDC_CHROMIUM_ARGS)
+_MMDC_ENV = {
+    **os.environ,
+    'PUPPETEER_SKIP_CHROMIUM_DOWNLOAD': 'true',
+    'PUPPETEER_EXECUTABLE_PATH': '/usr/bin/chromium-browser',
+    'CHROME_BIN': '/usr/bin/chromium-browser',
+    'CHROMIUM_FLAGS': _MMDC_CHROMIUM_FLAGS,
+    'PUPPETEER_ARGS': _MMDC_CHROMIUM_FLAGS,
+    'HOME': '/tmp',
+    'TMPDIR': MERMAID_TMPDIR
+}
+
+@functools.lru_cache(maxsize=1)
+def _mmdc_config_args() -> Tuple[str, ...]:
+    """The config arguments for mmdc, worked out once per process"""
+    # Use the mmdc config if there is one (includes puppeteer settings) - check both locations
+    if os.path.exists('/app/.mmdc'):
+        logger.info("Using mmdc config file: /app/.mmdc")
+        config_args = ('--configFile', '/app/.mmdc')
+    elif os.path.exists('/app/puppeteer-config.json'):
+        logger.info("Using puppeteer config file: /app/puppeteer-config.json")
+        config_args = ('-p', '/app/puppeteer-config.json')
+    else:
+        # Puppeteer only reads launch options from a config file, so write one with our flags
+        config_path = _write_puppeteer_config()
+        config_args = ('-p', config_path) if config_path else ()
+    
+    return config_args
+
+# Whether mmdc can render anything here: None until a render fails, then settled by rendering a
+# known-good diagram. A broken Chromium setup (e.g. the sandbox) fails every diagram the same way,
+# so once the check fails too, mmdc isn't started again in this process.
+_MMDC_CHECK_DIAGRAM = 'graph TD\n    A --> B'
+_mmdc_check_lock = threading.Lock()
+_mmdc_renders: Optional[bool] = None
+
+# Diagram render settings (they're part of the cache key). Rasters are rendered at the size
+# they're shown in the PDF, a 6 x 4.5 inch box, at 150 DPI print resolution.
+MERMAID_THEME = 'neutral'
+MERMAID_DPI = 150
+# The worker's PNGs are browser screenshots, in CSS pixels: 96 to the inch
+SCREENSHOT_DPI = 96
+MERMAID_WIDTH = int(6.0 * MERMAID_DPI)
+MERMAID_HEIGHT = int(4.5 * MERMAID_DPI)
+
+# Rendered diagrams, named by a hash of their source, the render settings and the renderer version.
+# Kept across runs; once the directory passes MERMAID_CACHE_MAX_BYTES the least recently used
+# entries (by mtime, which a cache hit refreshes) are removed.
+_MERMAID_CACHE_DIR = Path(tempfile.gettempdir()) / "mermaid_cache"
+MERMAID_CACHE_MAX_BYTES = int(os.environ.get('MERMAID_CACHE_MAX_BYTES', 256 * 1024 * 1024))
 
-# Set availability flag
-MMDC_AVAILABLE = check_mmdc_available()
-if MMDC_AVAILABLE:
-    logger.info("mmdc CLI is available for Mermaid diagram generation")
-else:
-    logger.warning("mmdc CLI not found - install with: npm install -g @mermaid-js/mermaid-cli")
+# Diagrams rendered at once: one per Node worker in the pool (and at most that many mmdc
+# processes, each with its own Chromium, on the fallback path)
+MAX_MERMAID_WORKERS = MERMAID_POOL_SIZE
+
+@functools.lru_cache(maxsize=1)
+def _mermaid_renderer() -> str:
+    """Which renderer this process uses and its version, for the cache key: the worker's render
+    packages when the worker can run, else mmdc. Worked out once per process."""
+    worker_version = get_worker_version()
+    if worker_version is not None:
+        return f"worker {worker_version}"
+    return f"mmdc {get_mmdc_version() or ''}"
+
+def _mermaid_cache_path(mermaid_code: str, suffix: str) -> Path:
+    """Path of the cached render of a diagram in one format, '.svg' or '.png' (which may not exist yet)"""
+    key = f"{mermaid_code.strip()}\0{MERMAID_THEME}\0{MERMAID_WIDTH}x{MERMAID_HEIGHT}\0{_mermaid_renderer()}"
+    digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    return _MERMAID_CACHE_DIR / f"{digest}{suffix}"
+
+def _find_cached_mermaid(mermaid_code: str) -> Optional[Path]:
+    """Path of the cached render of a diagram, SVG preferred, or None if it hasn't been rendered"""
+    stem = _mermaid_cache_path(mermaid_code, '')
+    for suffix in ('.svg', '.png'):
+        path = stem.with_suffix(suffix)
+        if path.exists():
+            return path
+    return None
+
+def _write_mermaid_cache(mermaid_code: str, suffix: str, data: bytes) -> Path:
+    """Store a render in the cache and return its path. The data is written to a temp file and
+    moved into place, so a half-written file is never picked up as a cache hit."""
+    cache_path = _mermaid_cache_path(mermaid_code, suffix)
+    _MERMAID_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=_MERMAID_CACHE_DIR, suffix=suffix, delete=False) as f:
+        try:
+            f.write(data)
+            f.close()
+            os.replace(f.name, cache_path)
+        except BaseException:
+            # The trim skips temp files, so one left behind here would never be removed
+            os.unlink(f.name)
+            raise
+    _trim_mermaid_cache()
+    return cache_path
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def _image_size(image_data: bytes) -> Tuple[int, int]:
+    """(width, height) in pixels: straight from the IHDR chunk for a PNG, through PIL otherwise"""
+    if len(image_data) >= 24 and image_data.startswith(_PNG_SIGNATURE) and image_data[12:16] == b'IHDR':
+        return struct.unpack_from('>II', image_data, 16)
+    with PILImage.open(BytesIO(image_data)) as pil_img:
+        return pil_img.size
+
+_IHDR_END = 33  # signature, then the IHDR chunk: length, type, 13 bytes of data, CRC
+_INCHES_PER_METER = 39.37
+
+def _png_dpi(image_data: bytes) -> Optional[float]:
+    """Resolution recorded in a PNG's pHYs chunk, or None if it has none (or isn't a PNG)"""
+    if not image_data.startswith(_PNG_SIGNATURE):
+        return None
+    offset = len(_PNG_SIGNATURE)
+    # pHYs has to come before the image data, so stop at the first IDAT
+    while offset + 8 <= len(image_data):
+        length, chunk_type = struct.unpack_from('>I4s', image_data, offset)
+        if chunk_type == b'pHYs' and length == 9 and offset + 17 <= len(image_data):
+            x_per_unit, _, unit = struct.unpack_from('>IIB', image_data, offset + 8)
+            return x_per_unit / _INCHES_PER_METER if unit == 1 and x_per_unit else None
+        if chunk_type == b'IDAT':
+            return None
+        offset += length + 12
+    return None
+
+def _set_png_dpi(image_data: bytes, dpi: float) -> bytes:
+    """The PNG with a pHYs chunk recording its resolution inserted after IHDR (left as is if it
+    already has one, or isn't a PNG)"""
+    if _png_dpi(image_data) is not None or not image_data.startswith(_PNG_SIGNATURE) \
+            or image_data[12:16] != b'IHDR':
+        return image_data
+    per_meter = round(dpi * _INCHES_PER_METER)
+    body = b'pHYs' + struct.pack('>IIB', per_meter, per_meter, 1)
+    chunk = struct.pack('>I', 9) + body + struct.pack('>I', zlib.crc32(body))
+    return image_data[:_IHDR_END] + chunk + image_data[_IHDR_END:]
+
+def _touch_mermaid_cache(cache_path: Path):
+    """Mark a cache entry as recently used"""
+    try:
+        os.utime(cache_path)
+    except OSError:
+        pass
+
+def _trim_mermaid_cache():
+    """Remove the least recently used cache entries until the directory fits MERMAID_CACHE_MAX_BYTES"""
+    try:
+        # tempfile names ("tmp...") are renders still being written; cache entries are hex digests
+        entries = [
+            (entry.stat(), entry.path) for entry in os.scandir(_MERMAID_CACHE_DIR)
+            if entry.name.endswith(('.svg', '.png')) and not entry.name.startswith('tmp')
+        ]
+    except OSError:
+        return
+    total = sum(stat.st_size for stat, _ in entries)
+    if total <= MERMAID_CACHE_MAX_BYTES:
+        return
+    
+    for stat, path in sorted(entries, key=lambda entry: entry[0].st_mtime):
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= stat.st_size
+        if total <= MERMAID_CACHE_MAX_BYTES:
+            break
+    logger.info(f"Trimmed Mermaid cache to {total} bytes")
 
 class HeaderFooterCanvas(canvas.Canvas):
-    """Custom canvas class for adding headers and footers"""
+    """Custom canvas class for adding headers and footers
+    
+    Headers and footers are drawn as each page finishes. The total page count isn't known until
+    the end, so each "Page N of M" is a form XObject that save() fills in once it is.
+    """
     
     def __init__(self, *args, **kwargs):
         canvas.Canvas.__init__(self, *args, **kwargs)
-        self._saved_page_states = []
         self.page_count = 0
 
     def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
         self.page_count += 1
+        self.draw_page_number(self.page_count)
+        canvas.Canvas.showPage(self)
 
     def save(self):
-        num_pages = len(self._saved_page_states)
-        for (page_num, state) in enumerate(self._saved_page_states):
-            self.__dict__.update(state)
-            self.draw_page_number(page_num + 1, num_pages)
-            canvas.Canvas.showPage(self)
+        for page_num in range(1, self.page_count + 1):
+            self.beginForm(f'pageNumber{page_num}')
+            self.draw_page_total(page_num, self.page_count)
+            self.endForm()
         canvas.Canvas.save(self)
 
-    def draw_page_number(self, page_num, total_pages):
+    def draw_page_number(self, page_num):
         """Draw page number and header/footer"""
         # Draw header line
-        self.setStrokeColor(HexColor('#22D3EE'))
+        self.setStrokeColor(_COLOR_CYAN)
         self.setLineWidth(2)
         self.line(72, letter[1] - 50, letter[0] - 72, letter[1] - 50)
         
         # Draw footer
         self.setFont('Helvetica', 8)
-        self.setFillColor(HexColor('#666666'))
+        self.setFillColor(_COLOR_MUTED)
         
         # Left footer - Generated date
-        self.drawString(72, 30, f"Generated on {datetime.now().strftime('%B %d, %Y')}")
+        self.drawString(72, 30, f"Generated on {_today()}")
         
-        # Right footer - Page number
-        self.drawRightString(letter[0] - 72, 30, f"Page {page_num} of {total_pages}")
+        # Right footer - Page number, filled in by save()
+        self.doForm(f'pageNumber{page_num}')
         
         # Center footer - Document title
         self.drawCentredString(letter[0] / 2, 30, "Technical Design Document")
 
+    def draw_page_total(self, page_num, total_pages):
+        """Draw the "Page N of M" footer text (into the page's form)"""
+        self.setFont('Helvetica', 8)
+        self.setFillColor(_COLOR_MUTED)
+        self.drawRightString(letter[0] - 72, 30, f"Page {page_num} of {total_pages}")
+
 class GradientBackground(Flowable):
     """Custom flowable for gradient backgrounds"""
     
@@ -100,151 +415,334 @@ class GradientBackground(Flowable):
         self.canv.setFillColor(self.color1)
         self.canv.rect(0, 0, self.width, self.height, fill=1, stroke=0)
 
-class PDFGenerator:
-    """Generate PDF from markdown content with Mermaid diagrams"""
+@functools.lru_cache(maxsize=1)
+def _build_stylesheet():
+    """Build the sample stylesheet plus our custom styles, once per process.
     
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
+    The sheet is shared by every PDFGenerator, so treat it as read-only.
+    """
+    styles = getSampleStyleSheet()
     
-    def _setup_custom_styles(self):
-        """Setup custom professional styles for the PDF"""
-        
-        # Title page style
-        self.styles.add(ParagraphStyle(
-            name='DocumentTitle',
-            parent=self.styles['Title'],
-            fontSize=28,
-            spaceAfter=30,
-            spaceBefore=50,
-            textColor=HexColor('#1a1a1a'),
-            fontName='Helvetica-Bold',
-            alignment=TA_CENTER,
-            leading=34
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='Subtitle',
-            parent=self.styles['Normal'],
-            fontSize=16,
-            spaceAfter=40,
-            textColor=HexColor('#666666'),
-            fontName='Helvetica',
-            alignment=TA_CENTER,
-            leading=20
-        ))
-        
-        # Enhanced heading styles with better spacing and colors
-        self.styles.add(ParagraphStyle(
-            name='CustomHeading1',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            spaceAfter=16,
-            spaceBefore=20,
-            textColor=HexColor('#22D3EE'),
-            fontName='Helvetica-Bold',
-            leftIndent=0,
-            borderWidth=0,
-            borderPadding=0,
-            leading=28
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CustomHeading2', 
-            parent=self.styles['Heading2'],
-            fontSize=18,
-            spaceAfter=12,
-            spaceBefore=16,
-            textColor=HexColor('#2d3748'),
-            fontName='Helvetica-Bold',
-            leftIndent=0,
-            leading=22
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CustomHeading3',
-            parent=self.styles['Heading3'],
-            fontSize=14,
-            spaceAfter=8,
-            spaceBefore=12,
-            textColor=HexColor('#4a5568'),
-            fontName='Helvetica-Bold',
-            leftIndent=0,
-            leading=18
-        ))
-        
-        # Enhanced body text
-        self.styles.add(ParagraphStyle(
-            name='Body',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=8,
-            textColor=HexColor('#2d3748'),
-            fontName='Helvetica',
-            alignment=TA_JUSTIFY,
-            leading=14,
-            leftIndent=0,
-            rightIndent=0
-        ))
-        
-        # Professional code block style
-        self.styles.add(ParagraphStyle(
-            name='CodeBlock',
-            parent=self.styles['Code'],
+    # Spacing around headings, paragraphs and TOC entries lives in spaceBefore/spaceAfter
+    # rather than in Spacer flowables between them
+    
+    # Title page style
+    styles.add(ParagraphStyle(
+        name='DocumentTitle',
+        parent=styles['Title'],
+        fontSize=28,
+        spaceAfter=30,
+        spaceBefore=50,
+        textColor=HexColor('#1a1a1a'),
+        fontName='Helvetica-Bold',
+        alignment=TA_CENTER,
+        leading=34
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='Subtitle',
+        parent=styles['Normal'],
+        fontSize=16,
+        spaceAfter=40,
+        textColor=_COLOR_MUTED,
+        fontName='Helvetica',
+        alignment=TA_CENTER,
+        leading=20
+    ))
+    
+    # Enhanced heading styles with better spacing and colors
+    styles.add(ParagraphStyle(
+        name='CustomHeading1',
+        parent=styles['Heading1'],
+        fontSize=24,
+        spaceAfter=32,
+        spaceBefore=40,
+        textColor=_COLOR_CYAN,
+        fontName='Helvetica-Bold',
+        leftIndent=0,
+        borderWidth=0,
+        borderPadding=0,
+        leading=28
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CustomHeading2', 
+        parent=styles['Heading2'],
+        fontSize=18,
+        spaceAfter=24,
+        spaceBefore=32,
+        textColor=_COLOR_SLATE,
+        fontName='Helvetica-Bold',
+        leftIndent=0,
+        leading=22
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CustomHeading3',
+        parent=styles['Heading3'],
+        fontSize=14,
+        spaceAfter=16,
+        spaceBefore=24,
+        textColor=_COLOR_TEXT,
+        fontName='Helvetica-Bold',
+        leftIndent=0,
+        leading=18
+    ))
+    
+    # Enhanced body text
+    styles.add(ParagraphStyle(
+        name='Body',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=12,
+        textColor=_COLOR_SLATE,
+        fontName='Helvetica',
+        alignment=TA_JUSTIFY,
+        leading=14,
+        leftIndent=0,
+        rightIndent=0
+    ))
+    
+    # Professional code block style
+    styles.add(ParagraphStyle(
+        name='CodeBlock',
+        parent=styles['Code'],
+        fontSize=9,
+        spaceAfter=24,
+        spaceBefore=20,
+        backgroundColor=HexColor('#f7fafc'),
+        borderColor=_COLOR_GRID,
+        borderWidth=1,
+        borderPadding=12,
+        fontName='Courier-Bold',
+        textColor=_COLOR_SLATE,
+        leftIndent=0,
+        rightIndent=0,
+        leading=11
+    ))
+    
+    # Bullet points
+    styles.add(ParagraphStyle(
+        name='BulletPoint',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=4,
+        textColor=_COLOR_SLATE,
+        fontName='Helvetica',
+        leftIndent=20,
+        bulletIndent=10,
+        leading=14
+    ))
+    
+    # Emphasis styles
+    styles.add(ParagraphStyle(
+        name='Emphasis',
+        parent=styles['Normal'],
+        fontSize=11,
+        textColor=_COLOR_CYAN,
+        fontName='Helvetica-Bold'
+    ))
+    
+    # Quote style
+    styles.add(ParagraphStyle(
+        name='Quote',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=12,
+        spaceBefore=8,
+        textColor=_COLOR_TEXT,
+        fontName='Helvetica-Oblique',
+        leftIndent=30,
+        rightIndent=30,
+        borderColor=_COLOR_CYAN,
+        borderWidth=0,
+        borderPadding=0,
+        leading=14
+    ))
+
+    # Title above a Mermaid diagram: a heading 3 with a wider gap above it
+    styles.add(ParagraphStyle(
+        name='DiagramHeading',
+        parent=styles['CustomHeading3'],
+        spaceBefore=28
+    ))
+    
+    # Heading 4 (#### in markdown)
+    styles.add(ParagraphStyle(
+        name='CustomHeading4',
+        parent=styles['CustomHeading3'],
+        fontSize=12,
+        spaceAfter=12,
+        spaceBefore=18
+    ))
+    
+    # Table cell text, wrapped to the column width
+    styles.add(ParagraphStyle(
+        name='TableCell',
+        parent=styles['Normal'],
+        fontSize=9,
+        fontName='Helvetica',
+        leading=11,
+        alignment=TA_LEFT,
+        wordWrap='LTR'
+    ))
+    
+    # Table header text
+    styles.add(ParagraphStyle(
+        name='TableHeader',
+        parent=styles['Normal'],
+        fontSize=10,
+        fontName='Helvetica-Bold',
+        leading=12,
+        alignment=TA_CENTER,
+        textColor=_COLOR_WHITE,
+        wordWrap='LTR'
+    ))
+    
+    # Table of contents entries, one style per heading level
+    styles.add(ParagraphStyle(
+        name='TOCLevel1',
+        parent=styles['Normal'],
+        fontSize=11,
+        fontName='Helvetica-Bold',
+        textColor=_COLOR_SLATE,
+        spaceAfter=8
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='TOCLevel2',
+        parent=styles['Normal'],
+        fontSize=10,
+        leftIndent=15,
+        textColor=_COLOR_TEXT,
+        spaceAfter=7
+    ))
+    
+    for level in range(3, 7):
+        styles.add(ParagraphStyle(
+            name=f'TOCLevel{level}',
+            parent=styles['Normal'],
             fontSize=9,
-            spaceAfter=12,
-            spaceBefore=8,
-            backgroundColor=HexColor('#f7fafc'),
-            borderColor=HexColor('#e2e8f0'),
-            borderWidth=1,
-            borderPadding=12,
-            fontName='Courier-Bold',
-            textColor=HexColor('#2d3748'),
-            leftIndent=0,
-            rightIndent=0,
-            leading=11
-        ))
-        
-        # Bullet points
-        self.styles.add(ParagraphStyle(
-            name='BulletPoint',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=4,
-            textColor=HexColor('#2d3748'),
-            fontName='Helvetica',
-            leftIndent=20,
-            bulletIndent=10,
-            leading=14
-        ))
-        
-        # Emphasis styles
-        self.styles.add(ParagraphStyle(
-            name='Emphasis',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            textColor=HexColor('#22D3EE'),
-            fontName='Helvetica-Bold'
-        ))
-        
-        # Quote style
-        self.styles.add(ParagraphStyle(
-            name='Quote',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=12,
-            spaceBefore=8,
-            textColor=HexColor('#4a5568'),
-            fontName='Helvetica-Oblique',
-            leftIndent=30,
-            rightIndent=30,
-            borderColor=HexColor('#22D3EE'),
-            borderWidth=0,
-            borderPadding=0,
-            leading=14
+            leftIndent=15 * (level - 1),
+            textColor=_COLOR_MUTED,
+            spaceAfter=6
         ))
     
-    def generate_pdf(self, markdown_content: str, filename: str = "technical_document.pdf", session_id: str = None) -> BytesIO:
+    return styles
+
+# Headings, bullets and table cells repeat a lot (empty cells, "**Note:**", column headers),
+# and the output depends only on the text, so results are shared across documents
+def _replace_inline(match_obj) -> str:
+    kind = match_obj.lastgroup
+    inner = match_obj.group(kind)
+    if kind == 'code':
+        # Code spans are literal
+        return f'<font name="Courier"><b>{inner}</b></font>'
+    inner = _INLINE_RE.sub(_replace_inline, inner)
+    if kind == 'bold':
+        return f'<b>{inner}</b>'
+    if kind == 'italic':
+        return f'<i>{inner}</i>'
+    if kind == 'strike':
+        return f'<strike>{inner}</strike>'
+    # Links [text](url) - just show the text for PDF
+    return inner
+
+@functools.lru_cache(maxsize=4096)
+def _process_inline_markdown_cached(text: str) -> str:
+    """Convert inline markdown (bold, italic, code, links, strikethrough) to ReportLab markup in one scan"""
+    return _INLINE_RE.sub(_replace_inline, text)
+
+@functools.lru_cache(maxsize=1)
+def _format_date(day: date) -> str:
+    return day.strftime('%B %d, %Y')
+
+def _today() -> str:
+    """Today's date as shown on the title page and in the page footer"""
+    return _format_date(date.today())
+
+_INFO_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 12),
+    ('TEXTCOLOR', (0, 0), (0, -1), _COLOR_TEXT),
+    ('TEXTCOLOR', (1, 0), (1, -1), _COLOR_SLATE),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LINEBELOW', (0, 0), (-1, -1), 0.5, _COLOR_GRID),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+
+# Markdown tables: cyan header row, then striped data rows. The cell ranges are relative
+# (-1 is the last row/column), so one style fits tables of any size.
+_DEFAULT_TABLE_STYLE = TableStyle([
+    # Header row styling
+    ('BACKGROUND', (0, 0), (-1, 0), _COLOR_CYAN),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
+
+    # Data rows styling (the font applies to plain-string cells, matching TableCell)
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('LEADING', (0, 1), (-1, -1), 11),
+    ('BACKGROUND', (0, 1), (-1, -1), _COLOR_ROW),
+    ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 1), (-1, -1), 'TOP'),
+
+    # Grid and borders
+    ('GRID', (0, 0), (-1, -1), 1, _COLOR_GRID),
+
+    # Padding
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+
+    # Alternating row colors for better readability
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [_COLOR_WHITE, _COLOR_ROW]),
+])
+
+@functools.lru_cache(maxsize=1)
+def _title_page_parts():
+    """The static flowables that go before and after the title page's info table (which has the date)"""
+    styles = _build_stylesheet()
+    before_table = (
+        # Add some top spacing
+        Spacer(1, 100),
+        # Main title with enhanced styling
+        Paragraph("Technical Design Document", styles['DocumentTitle']),
+        # Subtitle
+        Paragraph("Comprehensive System Architecture & Implementation Guide", styles['Subtitle']),
+        # Add more spacing
+        Spacer(1, 80),
+    )
+    after_table = (
+        Spacer(1, 60),
+        # Add a stylish footer note
+        Paragraph(
+            "This document contains technical specifications and architectural details "
+            "generated by advanced AI analysis. All diagrams and code examples are "
+            "production-ready and follow industry best practices.",
+            styles['Quote']
+        ),
+    )
+    return before_table, after_table
+
+@functools.lru_cache(maxsize=1)
+def _toc_heading():
+    """The "Table of Contents" heading flowables"""
+    return (Paragraph("Table of Contents", _build_stylesheet()['CustomHeading1']), Spacer(1, 4))
+
+class PDFGenerator:
+    """Generate PDF from markdown content with Mermaid diagrams"""
+    
+    def __init__(self):
+        self.styles = _build_stylesheet()
+        self._toc_styles = tuple(self.styles[f'TOCLevel{level}'] for level in range(1, 7))
+        self._mmdc_config_args = _mmdc_config_args()
+    
+    def generate_pdf(self, markdown_content: str, filename: str = "technical_document.pdf") -> BytesIO:
         """Generate professional PDF from markdown content with enhanced styling"""
         logger.info("Starting enhanced PDF generation")
         
@@ -253,7 +751,7 @@ class PDFGenerator:
             buffer = BytesIO()
             
             # Create PDF document with custom canvas for headers/footers
-            doc = SimpleDocTemplate(
+            doc = BaseDocTemplate(
                 buffer,
                 pagesize=letter,
                 rightMargin=72,
@@ -263,6 +761,17 @@ class PDFGenerator:
                 title="Technical Design Document",
                 author="Mythril AI"
             )
+            # One frame filling the margins, as SimpleDocTemplate would make, except that a
+            # flowable's spaceBefore adds to the previous one's spaceAfter instead of overlapping
+            # it, so the gaps set in the styles add up the way explicit Spacers did
+            frame = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='normal',
+                          overlapAttachedSpace=0)
+            doc.addPageTemplates([PageTemplate(id='normal', frames=[frame], pagesize=doc.pagesize)])
+            
+            # Headings for the TOC come from the raw markdown; the body is cleaned while it's processed
+            parser = get_markdown_parser()
+            markdown_content = markdown_content.replace('\r\n', '\n').replace('\r', '\n')
+            headings = parser.extract_headings(markdown_content)
             
             # Build the story (content)
             story = []
@@ -272,21 +781,20 @@ class PDFGenerator:
             story.append(PageBreak())
             
             # Add dynamic table of contents based on actual content
-            story.extend(self._create_dynamic_toc(markdown_content))
+            story.extend(self._create_dynamic_toc(headings))
             story.append(PageBreak())
             
             # Process markdown content with enhanced styling
-            story.extend(self._process_markdown_content(markdown_content, session_id))
+            story.extend(self._process_markdown_content(markdown_content))
             
             # Build PDF with custom canvas
             doc.build(story, canvasmaker=HeaderFooterCanvas)
             
-            # Get PDF data
-            pdf_data = buffer.getvalue()
-            buffer.close()
+            # Hand back the buffer ReportLab wrote into, rewound, rather than a copy of it
+            buffer.seek(0)
             
             logger.info("Enhanced PDF generation completed successfully")
-            return BytesIO(pdf_data)
+            return buffer
             
         except Exception as e:
             logger.error(f"Error generating enhanced PDF: {e}")
@@ -294,64 +802,32 @@ class PDFGenerator:
     
     def _create_title_page(self) -> list:
         """Create a professional title page"""
-        title_elements = []
-        
-        # Add some top spacing
-        title_elements.append(Spacer(1, 100))
+        before_table, after_table = _title_page_parts()
         
-        # Main title with enhanced styling
-        title_elements.append(Paragraph("Technical Design Document", self.styles['DocumentTitle']))
-        
-        # Subtitle
-        title_elements.append(Paragraph("Comprehensive System Architecture & Implementation Guide", self.styles['Subtitle']))
-        
-        # Add more spacing
-        title_elements.append(Spacer(1, 80))
+        # Copies of the shared flowables, since building a document stores layout state on them
+        # and documents can be built concurrently
+        title_elements = [copy.copy(flowable) for flowable in before_table]
         
         # Add a professional info table
         info_data = [
             ['Document Type:', 'Technical Specification'],
             ['Generated By:', 'Mythril AI Assistant'],
-            ['Date:', datetime.now().strftime('%B %d, %Y')],
+            ['Date:', _today()],
             ['Version:', '1.0.0'],
         ]
         
         info_table = Table(info_data, colWidths=[2*inch, 3*inch])
-        info_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#4a5568')),
-            ('TEXTCOLOR', (1, 0), (1, -1), HexColor('#2d3748')),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LINEBELOW', (0, 0), (-1, -1), 0.5, HexColor('#e2e8f0')),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        info_table.setStyle(_INFO_TABLE_STYLE)
         
         title_elements.append(info_table)
-        title_elements.append(Spacer(1, 60))
-        
-        # Add a stylish footer note
-        footer_note = Paragraph(
-            "This document contains technical specifications and architectural details "
-            "generated by advanced AI analysis. All diagrams and code examples are "
-            "production-ready and follow industry best practices.",
-            self.styles['Quote']
-        )
-        title_elements.append(footer_note)
+        title_elements.extend(copy.copy(flowable) for flowable in after_table)
         
         return title_elements
     
-    def _create_dynamic_toc(self, content: str) -> list:
-        """Create dynamic table of contents based on actual content"""
+    def _create_dynamic_toc(self, headings: List[Dict]) -> list:
+        """Create dynamic table of contents from the headings extracted from the content"""
         toc_elements = []
         
-        # Parse headings from the content
-        parser = get_markdown_parser()
-        headings = parser.extract_headings(content)
-        
         logger.info(f"Found {len(headings)} headings in content for TOC")
         
         if not headings:
@@ -359,8 +835,10 @@ class PDFGenerator:
             logger.warning("No headings found in content, using TOC placeholder")
             return self._create_toc_placeholder()
         
-        toc_elements.append(Paragraph("Table of Contents", self.styles['CustomHeading1']))
-        toc_elements.append(Spacer(1, 20))
+        toc_elements.extend(copy.copy(flowable) for flowable in _toc_heading())
+        
+        # TOCLevel1-6, indexed by heading level - 1
+        toc_styles = self._toc_styles
         
         # Create TOC entries from actual headings
         page_counter = 3  # Start from page 3 (after title and TOC pages)
@@ -393,45 +871,7 @@ class PDFGenerator:
             toc_entry = f"{indent_spaces}{title} {dots} {page_ref}"
             
             # Use appropriate style based on heading level
-            if heading['level'] == 1:
-                style_name = 'TOCLevel1'
-                if style_name not in [s.name for s in self.styles.byName.values()]:
-                    self.styles.add(ParagraphStyle(
-                        name=style_name,
-                        parent=self.styles['Normal'],
-                        fontSize=11,
-                        fontName='Helvetica-Bold',
-                        textColor=HexColor('#2d3748'),
-                        spaceAfter=4
-                    ))
-                style = self.styles[style_name]
-            elif heading['level'] == 2:
-                style_name = 'TOCLevel2'
-                if style_name not in [s.name for s in self.styles.byName.values()]:
-                    self.styles.add(ParagraphStyle(
-                        name=style_name,
-                        parent=self.styles['Normal'],
-                        fontSize=10,
-                        leftIndent=15,
-                        textColor=HexColor('#4a5568'),
-                        spaceAfter=3
-                    ))
-                style = self.styles[style_name]
-            else:
-                style_name = f'TOCLevel{heading["level"]}'
-                if style_name not in [s.name for s in self.styles.byName.values()]:
-                    self.styles.add(ParagraphStyle(
-                        name=style_name,
-                        parent=self.styles['Normal'],
-                        fontSize=9,
-                        leftIndent=15 * (heading['level'] - 1),
-                        textColor=HexColor('#666666'),
-                        spaceAfter=2
-                    ))
-                style = self.styles[style_name]
-            
-            toc_elements.append(Paragraph(toc_entry, style))
-            toc_elements.append(Spacer(1, 4))
+            toc_elements.append(Paragraph(toc_entry, toc_styles[heading['level'] - 1]))
         
         logger.info(f"Generated TOC with {len(toc_elements)} elements")
         return toc_elements
@@ -440,8 +880,7 @@ class PDFGenerator:
         """Create table of contents placeholder when dynamic generation fails"""
         toc_elements = []
         
-        toc_elements.append(Paragraph("Table of Contents", self.styles['CustomHeading1']))
-        toc_elements.append(Spacer(1, 20))
+        toc_elements.extend(copy.copy(flowable) for flowable in _toc_heading())
         
         # Add some sample TOC entries (this could be enhanced to be dynamic)
         toc_entries = [
@@ -459,129 +898,135 @@ class PDFGenerator:
         
         return toc_elements
     
-    def _process_markdown_content(self, content: str, session_id: str = None) -> list:
+    def _process_markdown_content(self, content: str) -> list:
         """Process markdown content with enhanced styling and proper Mermaid rendering"""
         story = []
-        
-        # Clean markdown content first for better PDF rendering
         parser = get_markdown_parser()
-        content = parser.clean_markdown_for_pdf(content)
-        print(content)
-        
-        # Normalize line endings first for consistent matching
-        content = content.replace('\r\n', '\n').replace('\r', '\n')
         
-        # Extract Mermaid diagrams with robust pattern matching
-        mermaid_pattern = r'```\s*mermaid\s*\n(.*?)\n\s*```'
+        # Swap each Mermaid block for a numbered placeholder in a single pass over the content.
+        # This has to happen before cleaning, which would rewrite the ``` fences as inline code.
+        mermaid_replacements = {}
         
-        # Use finditer to get both the diagram content and exact match positions
-        mermaid_data = []
-        for match_obj in re.finditer(mermaid_pattern, content, re.DOTALL | re.IGNORECASE):
-            mermaid_data.append({
-                'diagram': match_obj.group(1),
-                'full_match': match_obj.group(0),
-                'start': match_obj.start(),
-                'end': match_obj.end()
-            })
+        def replace_mermaid(match_obj):
+            placeholder = f'[MERMAID_DIAGRAM_{len(mermaid_replacements)}]'
+            mermaid_replacements[placeholder] = match_obj.group(1)
+            logger.info(f"Created placeholder {placeholder} for Mermaid diagram {len(mermaid_replacements)}")
+            return placeholder
         
-        logger.info(f"Found {len(mermaid_data)} Mermaid diagrams in content")
+        content = _MERMAID_RE.sub(replace_mermaid, content)
+        logger.info(f"Found {len(mermaid_replacements)} Mermaid diagrams in content")
         
-        # Replace mermaid blocks with numbered placeholders (from end to start to preserve positions)
-        mermaid_replacements = {}
-        for i, data in enumerate(reversed(mermaid_data)):
-            actual_index = len(mermaid_data) - 1 - i
-            placeholder = f'[MERMAID_DIAGRAM_{actual_index}]'
-            mermaid_replacements[placeholder] = data['diagram']
-            
-            # Replace using exact match from regex
-            content = content[:data['start']] + placeholder + content[data['end']:]
-            logger.info(f"Created placeholder {placeholder} for Mermaid diagram {actual_index + 1}")
+        content = parser.clean_markdown_for_pdf(content)
+        logger.debug("Cleaned markdown (%d chars)", len(content))
         
         # Parse and handle tables first
         tables = parser.parse_markdown_tables(content)
         table_replacements = {}
-        for i, table in enumerate(tables):
-            placeholder = f'[TABLE_{i}]'
-            table_replacements[placeholder] = table
-            # Remove original table markdown from content
-            table_text = self._reconstruct_table_text(table)
-            content = content.replace(table_text, placeholder, 1)
+        if tables:
+            # Splice a placeholder over each table's span, walking the content once
+            parts = []
+            position = 0
+            for i, table in enumerate(tables):
+                placeholder = f'[TABLE_{i}]'
+                table_replacements[placeholder] = table
+                parts.append(content[position:table['start']])
+                parts.append(placeholder)
+                position = table['end']
+            parts.append(content[position:])
+            content = ''.join(parts)
             
-        # Split content by double newlines for paragraph processing
-        sections = content.split('\n\n')
+        # Start rendering the uncached diagrams in parallel; each result is collected when the
+        # section loop reaches its placeholder
+        uncached = {code for code in mermaid_replacements.values() if _find_cached_mermaid(code) is None}
+        render_futures = {}
+        executor = None
+        if uncached:
+            executor = ThreadPoolExecutor(max_workers=min(MAX_MERMAID_WORKERS, len(uncached)))
+            render_futures = {code: executor.submit(self._generate_mermaid_image, code) for code in uncached}
         
-        in_code_block = False
-        code_block_content = []
+        try:
+            in_code_block = False
+            code_block_content = []
         
-        for section in sections:
-            section = section.strip()
+            # Walk the content section by section (split on blank lines) for paragraph processing
+            for section in _iter_sections(content):
+                section = section.strip()
             
-            # Check for table placeholders
-            if section in table_replacements:
-                table_element = self._create_pdf_table(table_replacements[section])
-                if table_element:
-                    story.append(Spacer(1, 12))
-                    story.append(table_element)
-                    story.append(Spacer(1, 12))
-                continue
+                # Check for table placeholders
+                if section in table_replacements:
+                    table_element = self._create_pdf_table(table_replacements[section])
+                    if table_element:
+                        story.append(table_element)
+                    continue
             
-            # Check for Mermaid diagram placeholders
-            if section in mermaid_replacements:
-                logger.info(f"Processing Mermaid diagram placeholder: {section}")
-                diagram_img = self._generate_mermaid_image(mermaid_replacements[section], session_id)
-                if diagram_img:
-                    story.append(Spacer(1, 16))
-                    # Add diagram title
-                    story.append(Paragraph("System Architecture Diagram", self.styles['CustomHeading3']))
-                    story.append(Spacer(1, 8))
-                    story.append(diagram_img)
-                    story.append(Spacer(1, 16))
-                    logger.info("✅ Mermaid diagram added to PDF successfully")
-                else:
-                    # Fallback to text placeholder if image generation failed
-                    logger.warning("❌ Mermaid image generation failed, using text placeholder")
-                    text_placeholder = f"[Mermaid Diagram]\n{mermaid_replacements[section][:200]}..."
-                    story.append(Spacer(1, 12))
-                    story.append(Paragraph(text_placeholder, self.styles['CodeBlock']))
-                    story.append(Spacer(1, 12))
-                continue
+                # Check for Mermaid diagram placeholders
+                if section in mermaid_replacements:
+                    logger.info(f"Processing Mermaid diagram placeholder: {section}")
+                    mermaid_code = mermaid_replacements[section]
+                    # A diagram repeated in the document is only rendered once; later copies come from the cache
+                    future = render_futures.pop(mermaid_code, None)
+                    cache_path = _find_cached_mermaid(mermaid_code) if future is None else None
+                    if future is not None:
+                        diagram_img = future.result()
+                    elif cache_path is not None:
+                        logger.info(f"Using cached Mermaid image: {cache_path}")
+                        _touch_mermaid_cache(cache_path)
+                        diagram_img = self._load_mermaid_diagram(cache_path)
+                    else:
+                        diagram_img = self._generate_mermaid_image(mermaid_code)
+                    if diagram_img:
+                        # Add diagram title
+                        story.append(Paragraph("System Architecture Diagram", self.styles['DiagramHeading']))
+                        diagram_img.spaceAfter = 16
+                        story.append(diagram_img)
+                        logger.info("✅ Mermaid diagram added to PDF successfully")
+                    else:
+                        # Fallback to text placeholder if image generation failed
+                        logger.warning("❌ Mermaid image generation failed, using text placeholder")
+                        text_placeholder = f"[Mermaid Diagram]\n{mermaid_replacements[section][:200]}..."
+                        story.append(Paragraph(text_placeholder, self.styles['CodeBlock']))
+                    continue
             
-            # # Handle code blocks
-            # if section.startswith('```') and section.endswith('```'):
-            #     # Single section code block
-            #     lines = section.split('\n')
-            #     if len(lines) >= 2:
-            #         language = lines[0][3:].strip()
-            #         code_content = '\n'.join(lines[1:-1])
-            #         if code_content.strip():
-            #             story.append(Spacer(1, 8))
-            #             story.append(Paragraph(code_content, self.styles['CodeBlock']))
-            #             story.append(Spacer(1, 8))
-            #     continue
-            # elif section.startswith('```'):
-            #     in_code_block = True
-            #     code_block_content = [section[3:]]
-            #     continue
-            # elif section.endswith('```'):
-            #     in_code_block = False
-            #     code_block_content.append(section[:-3])
-            #     code_text = '\n'.join(code_block_content).strip()
-            #     if code_text:
-            #         story.append(Spacer(1, 8))
-            #         story.append(Paragraph(code_text, self.styles['CodeBlock']))
-            #         story.append(Spacer(1, 8))
-            #     code_block_content = []
-            #     continue
-            # elif in_code_block:
-            #     code_block_content.append(section)
-            #     continue
+                # # Handle code blocks
+                # if section.startswith('```') and section.endswith('```'):
+                #     # Single section code block
+                #     lines = section.split('\n')
+                #     if len(lines) >= 2:
+                #         language = lines[0][3:].strip()
+                #         code_content = '\n'.join(lines[1:-1])
+                #         if code_content.strip():
+                #             story.append(Spacer(1, 8))
+                #             story.append(Paragraph(code_content, self.styles['CodeBlock']))
+                #             story.append(Spacer(1, 8))
+                #     continue
+                # elif section.startswith('```'):
+                #     in_code_block = True
+                #     code_block_content = [section[3:]]
+                #     continue
+                # elif section.endswith('```'):
+                #     in_code_block = False
+                #     code_block_content.append(section[:-3])
+                #     code_text = '\n'.join(code_block_content).strip()
+                #     if code_text:
+                #         story.append(Spacer(1, 8))
+                #         story.append(Paragraph(code_text, self.styles['CodeBlock']))
+                #         story.append(Spacer(1, 8))
+                #     code_block_content = []
+                #     continue
+                # elif in_code_block:
+                #     code_block_content.append(section)
+                #     continue
             
-            if not section:
-                continue
+                if not section:
+                    continue
             
-            # Process lines within the section
-            lines = section.split('\n')
-            self._process_markdown_lines(lines, story)
+                # Process lines within the section
+                lines = section.split('\n')
+                self._process_markdown_lines(lines, story)
+        finally:
+            if executor:
+                # Nothing is left queued after a full pass; after an error, don't start the rest
+                executor.shutdown(cancel_futures=True)
         
         return story
     
@@ -597,32 +1042,17 @@ class PDFGenerator:
                 
             # Headers with enhanced styling
             if line.startswith('# '):
-                story.append(Spacer(1, 20))
                 title = self._process_inline_markdown(line[2:])
                 story.append(Paragraph(title, self.styles['CustomHeading1']))
-                story.append(Spacer(1, 16))
             elif line.startswith('## '):
-                story.append(Spacer(1, 16))
                 title = self._process_inline_markdown(line[3:])
                 story.append(Paragraph(title, self.styles['CustomHeading2']))
-                story.append(Spacer(1, 12))
             elif line.startswith('### '):
-                story.append(Spacer(1, 12))
                 title = self._process_inline_markdown(line[4:])
                 story.append(Paragraph(title, self.styles['CustomHeading3']))
-                story.append(Spacer(1, 8))
             elif line.startswith('#### '):
-                story.append(Spacer(1, 10))
                 title = self._process_inline_markdown(line[5:])
-                heading4_style = ParagraphStyle(
-                    name='CustomHeading4',
-                    parent=self.styles['CustomHeading3'],
-                    fontSize=12,
-                    spaceAfter=6,
-                    spaceBefore=8
-                )
-                story.append(Paragraph(title, heading4_style))
-                story.append(Spacer(1, 6))
+                story.append(Paragraph(title, self.styles['CustomHeading4']))
             # Enhanced bullet points with better formatting
             elif line.startswith('- ') or line.startswith('* '):
                 bullet_text = self._process_inline_markdown(line[2:])
@@ -633,7 +1063,7 @@ class PDFGenerator:
                     bullet_text = f"• {bullet_text}"
                 story.append(Paragraph(bullet_text, self.styles['BulletPoint']))
             # Numbered lists
-            elif re.match(r'^\d+\.\s', line):
+            elif _NUMLIST_RE.match(line):
                 formatted_line = self._process_inline_markdown(line)
                 story.append(Paragraph(formatted_line, self.styles['BulletPoint']))
             # Regular paragraphs
@@ -641,49 +1071,15 @@ class PDFGenerator:
                 if line and not line.startswith('```'):
                     formatted_line = self._process_inline_markdown(line)
                     story.append(Paragraph(formatted_line, self.styles['Body']))
-                    story.append(Spacer(1, 4))
             
             i += 1
     
     def _process_inline_markdown(self, text: str) -> str:
         """Process inline markdown formatting (bold, italic, code, links)"""
-        # Handle bold text (**text**)
-        text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-        
-        # Handle italic text (*text*)
-        text = re.sub(r'(?<!\*)\*([^*]+)\*(?!\*)', r'<i>\1</i>', text)
-        
-        # Handle inline code (`code`)
-        text = re.sub(r'`([^`]+)`', r'<font name="Courier"><b>\1</b></font>', text)
-        
-        # Handle links [text](url) - just show the text for PDF
-        text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)
-        
-        # Handle strikethrough (~~text~~)
-        text = re.sub(r'~~(.+?)~~', r'<strike>\1</strike>', text)
-        
-        return text
-    
-    def _reconstruct_table_text(self, table_data: Dict) -> str:
-        """Reconstruct original table markdown text for replacement"""
-        lines = []
-        
-        # Add header row
-        if table_data['headers']:
-            header_line = '| ' + ' | '.join(table_data['headers']) + ' |'
-            lines.append(header_line)
-            
-            # Add separator
-            separator_cells = ['---' for _ in table_data['headers']]
-            separator_line = '| ' + ' | '.join(separator_cells) + ' |'
-            lines.append(separator_line)
-        
-        # Add data rows
-        for row in table_data['rows']:
-            row_line = '| ' + ' | '.join(row) + ' |'
-            lines.append(row_line)
-        
-        return '\n'.join(lines)
+        # Most lines have no markup at all; skip the scan (and the cache) for those
+        if _MARKDOWN_CHARS.isdisjoint(text):
+            return text
+        return _process_inline_markdown_cached(text)
     
     def _create_pdf_table(self, table_data: Dict) -> Optional[Table]:
         """Create a properly formatted ReportLab Table from markdown table data"""
@@ -694,28 +1090,8 @@ class PDFGenerator:
             # Prepare table data for ReportLab with Paragraph objects for text wrapping
             pdf_table_data = []
             
-            # Create a style for table cell text that enables wrapping
-            cell_style = ParagraphStyle(
-                name='TableCell',
-                parent=self.styles['Normal'],
-                fontSize=9,
-                fontName='Helvetica',
-                leading=11,
-                alignment=TA_LEFT,
-                wordWrap='LTR'
-            )
-            
-            # Create a style for table header text
-            header_style = ParagraphStyle(
-                name='TableHeader',
-                parent=self.styles['Normal'],
-                fontSize=10,
-                fontName='Helvetica-Bold',
-                leading=12,
-                alignment=TA_CENTER,
-                textColor=HexColor('#ffffff'),
-                wordWrap='LTR'
-            )
+            cell_style = self.styles['TableCell']
+            header_style = self.styles['TableHeader']
             
             # Add headers as Paragraph objects for text wrapping
             headers = []
@@ -724,51 +1100,35 @@ class PDFGenerator:
                 headers.append(Paragraph(processed_cell, header_style))
             pdf_table_data.append(headers)
             
-            # Add data rows as Paragraph objects for text wrapping
+            # Calculate column widths
+            num_cols = len(headers)
+            available_width = 6.5 * inch  # Leave margins
+            col_width = available_width / num_cols
+            # Widest plain cell that fits on one line inside the cell padding
+            max_plain_width = col_width - 12
+            
+            # Add data rows; cells only need a Paragraph when they have to wrap or carry markup,
+            # the rest are drawn as plain strings with the font set in the table style below
             for row in table_data['rows']:
                 formatted_row = []
                 for cell in row:
-                    processed_cell = self._process_inline_markdown(cell)
-                    formatted_row.append(Paragraph(processed_cell, cell_style))
+                    if _CELL_MARKUP_CHARS.isdisjoint(cell) and stringWidth(cell, 'Helvetica', 9) <= max_plain_width:
+                        formatted_row.append(cell)
+                    else:
+                        processed_cell = self._process_inline_markdown(cell)
+                        formatted_row.append(Paragraph(processed_cell, cell_style))
                 
                 # Ensure row has same number of columns as header
                 while len(formatted_row) < len(headers):
-                    formatted_row.append(Paragraph('', cell_style))
+                    formatted_row.append('')
                 formatted_row = formatted_row[:len(headers)]  # Trim extra columns
                 pdf_table_data.append(formatted_row)
             
-            # Calculate column widths
-            num_cols = len(headers)
-            available_width = 6.5 * inch  # Leave margins
-            col_width = available_width / num_cols
-            
             # Create the table
-            table = Table(pdf_table_data, colWidths=[col_width] * num_cols)
+            table = Table(pdf_table_data, colWidths=[col_width] * num_cols, spaceBefore=12, spaceAfter=12)
             
             # Apply professional table styling
-            table.setStyle(TableStyle([
-                # Header row styling
-                ('BACKGROUND', (0, 0), (-1, 0), HexColor('#22D3EE')),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
-                
-                # Data rows styling
-                ('BACKGROUND', (0, 1), (-1, -1), HexColor('#f8f9fa')),
-                ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-                ('VALIGN', (0, 1), (-1, -1), 'TOP'),
-                
-                # Grid and borders
-                ('GRID', (0, 0), (-1, -1), 1, HexColor('#e2e8f0')),
-                
-                # Padding
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                
-                # Alternating row colors for better readability
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [HexColor('#ffffff'), HexColor('#f8f9fa')]),
-            ]))
+            table.setStyle(_DEFAULT_TABLE_STYLE)
             
             return table
             
@@ -776,242 +1136,206 @@ class PDFGenerator:
             logger.error(f"Error creating PDF table: {e}")
             return None
     
-    def _generate_mermaid_image(self, mermaid_code: str, session_id: str = None) -> Optional[Image]:
-        """Generate PNG image from Mermaid diagram code using mmdc CLI - simplified approach"""
+    def _generate_mermaid_image(self, mermaid_code: str) -> Optional[Flowable]:
+        """Render Mermaid diagram code to a flowable, with the Node worker or else the mmdc CLI
+        
+        The worker's SVGs are kept as vector drawings when svglib is installed; otherwise they
+        are rasterized to PNG with cairosvg. mmdc renders are always PNG.
+        """
         try:
-            logger.info("Generating Mermaid diagram image using mmdc CLI")
-            
-            if not MMDC_AVAILABLE:
-                logger.warning("mmdc CLI not available, showing diagram as text")
-                return None
-            
             # Clean up the mermaid code
             mermaid_code = mermaid_code.strip()
             
-            # Create temporary file for mermaid code
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.mmd', delete=False) as f:
-                f.write(mermaid_code)
-                mermaid_file = f.name
+            # The persistent worker renders without starting a browser per diagram; mmdc is the fallback
+            worker = get_mermaid_worker()
+            if worker is not None:
+                try:
+                    # With no way to use an SVG here, ask for a PNG
+                    kind, data = worker.render(mermaid_code, png=svg2rlg is None and cairosvg is None)
+                    return self._store_mermaid_render(mermaid_code, kind, data)
+                except MermaidRenderError as e:
+                    logger.warning(f"Mermaid worker failed, falling back to mmdc: {e}")
             
-            # Output image path
-            output_path = mermaid_file.replace('.mmd', '.png')
+            return self._render_mermaid_with_mmdc(mermaid_code)
+                    
+        except Exception as e:
+            logger.error(f"Error in Mermaid generation: {e}")
+            return None
+    
+    def _store_mermaid_render(self, mermaid_code: str, kind: str, data: bytes) -> Optional[Flowable]:
+        """Write a worker render into the cache (atomically) and load it as a flowable"""
+        if kind == 'png':
+            # Record the screenshot's resolution in the file, so it isn't sized as a MERMAID_DPI raster
+            data = _set_png_dpi(data, SCREENSHOT_DPI)
+        elif svg2rlg is None:
+            data = cairosvg.svg2png(bytestring=data, output_width=MERMAID_WIDTH, background_color='white')
+            kind = 'png'
+        cache_path = _write_mermaid_cache(mermaid_code, f'.{kind}', data)
+        logger.info(f"Rendered Mermaid diagram with the worker: {cache_path}")
+        return self._load_mermaid_diagram(cache_path, data)
+    
+    def _render_mermaid_with_mmdc(self, mermaid_code: str) -> Optional[Flowable]:
+        """Render a diagram with the mmdc CLI (one Chromium per call) into the cache"""
+        if not check_mmdc_available() or _mmdc_renders is False:
+            logger.warning("mmdc CLI not available, showing diagram as text")
+            return None
+        
+        logger.info("Generating Mermaid diagram image using mmdc CLI")
+        
+        # Always a PNG: mmdc draws flowchart, class and state labels as <foreignObject> HTML,
+        # which svg2rlg drops, so its SVGs would come out as boxes and arrows with no text
+        try:
+            result = self._run_mmdc(mermaid_code, 'png')
             
-            try:
-                logger.info(f"Generating PNG from {mermaid_file} to {output_path}")
-                
-                # Use mermaid-cli to generate image with optimized settings
-                # Ensure Puppeteer environment variables are passed to subprocess
-                env = os.environ.copy()
-                env.update({
-                    'PUPPETEER_SKIP_CHROMIUM_DOWNLOAD': 'true',
-                    'PUPPETEER_EXECUTABLE_PATH': '/usr/bin/chromium-browser',
-                    'CHROME_BIN': '/usr/bin/chromium-browser',
-                    'CHROMIUM_FLAGS': '--no-sandbox --disable-setuid-sandbox --disable-dev-shm-usage --disable-gpu --disable-extensions',
-                    'PUPPETEER_ARGS': '--no-sandbox --disable-setuid-sandbox --disable-dev-shm-usage --disable-gpu --disable-extensions',
-                    'HOME': '/tmp',
-                    'TMPDIR': '/tmp'
-                })
-                
-                # Try mmdc with config files - check both locations
-                mmdc_config_path = '/app/.mmdc' if os.path.exists('/app/.mmdc') else None
-                puppeteer_config_path = '/app/puppeteer-config.json' if os.path.exists('/app/puppeteer-config.json') else None
-                
-                cmd_args = [
-                    'mmdc',
-                    '-i', mermaid_file,
-                    '-o', output_path,
-                    '-t', 'neutral', 
-                    '-b', 'white',
-                    '--width', '1200',
-                    '--height', '900'
-                ]
-                
-                # Try with mmdc config first (includes puppeteer settings)
-                if mmdc_config_path:
-                    cmd_args.extend(['--configFile', mmdc_config_path])
-                    logger.info(f"Using mmdc config file: {mmdc_config_path}")
-                elif puppeteer_config_path:
-                    cmd_args.extend(['-p', puppeteer_config_path])
-                    logger.info(f"Using puppeteer config file: {puppeteer_config_path}")
-                else:
-                    logger.warning("No config files found, using environment variables and defaults")
-                
-                result = subprocess.run(cmd_args, capture_output=True, text=True, timeout=60, env=env)
+            if result.returncode == 0 and result.stdout:
+                cache_path = _write_mermaid_cache(mermaid_code, '.png', result.stdout)
+                logger.info(f"Successfully generated Mermaid image: {cache_path}")
+                return self._load_mermaid_diagram(cache_path, result.stdout)
+            
+            logger.error(f"mmdc failed with return code {result.returncode}")
+            logger.error(f"stderr: {result.stderr.decode('utf-8', 'replace')}")
+            self._check_mmdc_renders()
+            return None
                 
-                if result.returncode == 0:
-                    logger.info(f"Successfully generated Mermaid image: {output_path}")
-                    
-                    # Verify the file was created and has content
-                    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                        # Process the image for PDF inclusion
-                        img = self._process_mermaid_image_simple(output_path)
-                        return img
-                    else:
-                        logger.error(f"Generated PNG file is missing or empty: {output_path}")
-                        return None
-                else:
-                    logger.error(f"mmdc failed with return code {result.returncode}")
-                    logger.error(f"stderr: {result.stderr}")
-                    logger.error(f"stdout: {result.stdout}")
-                    
-                    # Try alternative mmdc command with minimal options and explicit Puppeteer args
-                    logger.info("Trying mmdc with explicit Puppeteer arguments...")
-                    
-                    # Create a temporary puppeteer config for this attempt
-                    temp_config = {
-                        "headless": "new",
-                        "args": [
-                            "--no-sandbox",
-                            "--disable-setuid-sandbox", 
-                            "--disable-dev-shm-usage",
-                            "--disable-gpu",
-                            "--disable-extensions",
-                            "--disable-web-security",
-                            "--allow-running-insecure-content",
-                            "--disable-background-timer-throttling",
-                            "--disable-backgrounding-occluded-windows",
-                            "--disable-renderer-backgrounding"
-                        ],
-                        "executablePath": "/usr/bin/chromium-browser"
-                    }
-                    
-                    # Write temporary config
-                    temp_config_path = '/tmp/temp-puppeteer-config.json'
-                    with open(temp_config_path, 'w') as f:
-                        json.dump(temp_config, f)
-                    
-                    try:
-                        result2 = subprocess.run([
-                            'mmdc',
-                            '-i', mermaid_file,
-                            '-o', output_path,
-                            '-b', 'white',
-                            '-p', temp_config_path
-                        ], capture_output=True, text=True, timeout=60, env=env)
-                        
-                        if result2.returncode == 0 and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                            logger.info(f"Successfully generated Mermaid image with explicit config: {output_path}")
-                            img = self._process_mermaid_image_simple(output_path)
-                            return img
-                        else:
-                            logger.error(f"Explicit config mmdc failed. stderr: {result2.stderr}, stdout: {result2.stdout}")
-                            
-                            # Final fallback - try with no config at all
-                            logger.info("Final attempt with no config files...")
-                            result3 = subprocess.run([
-                                'mmdc', '-i', mermaid_file, '-o', output_path
-                            ], capture_output=True, text=True, timeout=30, env=env)
-                            
-                            if result3.returncode == 0 and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                                logger.info(f"Successfully generated Mermaid image with no config: {output_path}")
-                                img = self._process_mermaid_image_simple(output_path)
-                                return img
-                            else:
-                                logger.error(f"All mmdc methods failed. Final stderr: {result3.stderr}")
-                                logger.warning("All mmdc attempts failed, returning text placeholder")
-                                return None
-                    finally:
-                        # Clean up temp config
-                        try:
-                            os.unlink(temp_config_path)
-                        except:
-                            pass
-                    
+        except subprocess.TimeoutExpired:
+            logger.warning(f"mmdc command timed out after {MMDC_TIMEOUT} seconds")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error running mmdc: {e}")
+            return None
+
+    def _run_mmdc(self, mermaid_code: str, output_format: str) -> subprocess.CompletedProcess:
+        """Run mmdc once on a diagram; raises subprocess.TimeoutExpired after MMDC_TIMEOUT seconds"""
+        # The source goes in on stdin and the render comes back on stdout, so no temp files
+        cmd_args = [
+            'mmdc',
+            '-i', '-',
+            '-o', '-',
+            '-e', output_format,
+            '-t', MERMAID_THEME,
+            '-b', 'white',
+            '--width', str(MERMAID_WIDTH),
+            '--height', str(MERMAID_HEIGHT),
+            *self._mmdc_config_args
+        ]
+        # mmdc gets its own process group, so a timeout can kill the Chromium it launched as well
+        process = subprocess.Popen(cmd_args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   env=_MMDC_ENV, start_new_session=True)
+        try:
+            stdout, stderr = process.communicate(mermaid_code.encode('utf-8'), timeout=MMDC_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            process.communicate()
+            raise
+        return subprocess.CompletedProcess(cmd_args, process.returncode, stdout, stderr)
+    
+    def _check_mmdc_renders(self):
+        """After a failed render, find out once whether mmdc can render anything, so a broken
+        setup costs one failed Chromium start per process rather than one per diagram"""
+        global _mmdc_renders
+        with _mmdc_check_lock:
+            if _mmdc_renders is not None:
+                return
+            try:
+                result = self._run_mmdc(_MMDC_CHECK_DIAGRAM, 'svg')
+                _mmdc_renders = result.returncode == 0 and bool(result.stdout)
             except subprocess.TimeoutExpired:
-                logger.warning("mmdc command timed out after 45 seconds")
-                return None
-            except subprocess.CalledProcessError as e:
-                logger.error(f"mmdc command failed: {e}")
-                return None
-            except Exception as e:
-                logger.error(f"Unexpected error running mmdc: {e}")
+                _mmdc_renders = False
+            if not _mmdc_renders:
+                logger.error("mmdc can't render a basic diagram; not using it for the rest of this process")
+    
+    def _load_mermaid_diagram(self, path: Path, data: Optional[bytes] = None) -> Optional[Flowable]:
+        """Load a cached render as a flowable: a vector drawing for SVG, an image for PNG
+        
+        A render that was just made passes its bytes as data, so the cache file isn't read back.
+        """
+        if path.suffix == '.svg':
+            return self._process_mermaid_svg(str(path), data)
+        return self._process_mermaid_image_simple(str(path), data)
+    
+    def _process_mermaid_svg(self, svg_path: str, svg_data: Optional[bytes] = None) -> Optional[Flowable]:
+        """Load a Mermaid SVG as a ReportLab Drawing, scaled like the PNG renders (the file is left in place)"""
+        try:
+            drawing = svg2rlg(svg_path if svg_data is None else BytesIO(svg_data))
+            if drawing is None or not drawing.width or not drawing.height:
+                logger.warning(f"Could not read Mermaid SVG: {svg_path}")
                 return None
-            finally:
-                # Clean up temporary files
-                try:
-                    if os.path.exists(mermaid_file):
-                        os.unlink(mermaid_file)
-                    if os.path.exists(output_path):
-                        # Don't delete yet - we need it for image processing
-                        pass
-                except Exception as cleanup_error:
-                    logger.warning(f"Failed to clean up temp file: {cleanup_error}")
-                    
+            
+            # Fit within the same box as the PNGs; a vector scales up losslessly to the minimum width
+            max_width, max_height = 6.0 * inch, 4.5 * inch
+            scale = min(max_width / drawing.width, max_height / drawing.height, 1.0)
+            if drawing.width * scale < 3.0 * inch:
+                scale = min(3.0 * inch / drawing.width, max_height / drawing.height)
+            
+            drawing.scale(scale, scale)
+            drawing.width *= scale
+            drawing.height *= scale
+            drawing.hAlign = 'CENTER'
+            logger.info(f"Final drawing dimensions: {drawing.width / inch:.2f} x {drawing.height / inch:.2f} inches")
+            return drawing
+        
         except Exception as e:
-            logger.error(f"Error in Mermaid generation: {e}")
+            logger.error(f"Failed to load Mermaid SVG: {e}")
             return None
-
-    def _process_mermaid_image_simple(self, image_path: str) -> Optional[Image]:
-        """Simplified image processing for Mermaid PNG files"""
+    
+    def _process_mermaid_image_simple(self, image_path: str, image_data: Optional[bytes] = None) -> Optional[Image]:
+        """Simplified image processing for Mermaid PNG files (the file is left in place for reuse)"""
         try:
-            # Verify file exists and has content
-            if not os.path.exists(image_path) or os.path.getsize(image_path) == 0:
+            # Load image data into memory once (unless the caller has it); the size check and the
+            # dimensions come from it
+            if image_data is None:
+                try:
+                    with open(image_path, 'rb') as f:
+                        image_data = f.read()
+                except FileNotFoundError:
+                    image_data = b''
+            if not image_data:
                 logger.warning(f"Image file does not exist or is empty: {image_path}")
                 return None
             
-            logger.info(f"Processing Mermaid image: {image_path} (size: {os.path.getsize(image_path)} bytes)")
-            
-            # Load image data into memory first
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
+            logger.info(f"Processing Mermaid image: {image_path} (size: {len(image_data)} bytes)")
             
             # Create BytesIO from the data
             image_buffer = BytesIO(image_data)
             
             try:
-                # Use PIL to get proper dimensions and validate image
-                with PILImage.open(image_buffer) as pil_img:
-                    logger.info(f"Original image dimensions: {pil_img.size}, mode: {pil_img.mode}")
-                    
-                    # Calculate optimal size for PDF (maintain aspect ratio)
-                    original_width, original_height = pil_img.size
-                    
-                    # Target dimensions for PDF
-                    max_width_inches = 6.0 * inch
-                    max_height_inches = 4.5 * inch
-                    
-                    # Calculate scaling to fit within max dimensions
-                    width_scale = max_width_inches / (original_width / 96.0)  # Assuming 96 DPI
-                    height_scale = max_height_inches / (original_height / 96.0)
-                    scale = min(width_scale, height_scale, 1.0)  # Don't scale up
-                    
-                    # Calculate final dimensions
-                    final_width = (original_width / 96.0) * scale
-                    final_height = (original_height / 96.0) * scale
-                    
-                    # Ensure minimum readable size
-                    min_width = 3.0 * inch
-                    min_height = 2.0 * inch
-                    if final_width < min_width:
-                        scale_factor = min_width / final_width
-                        final_width = min_width
-                        final_height = final_height * scale_factor
-                    if final_height < min_height:
-                        scale_factor = min_height / final_height
-                        final_height = min_height  
-                        final_width = final_width * scale_factor
+                original_width, original_height = _image_size(image_data)
+                logger.info(f"Original image dimensions: {(original_width, original_height)}")
+                
+                # Calculate optimal size for PDF (maintain aspect ratio)
+                # Target dimensions for PDF
+                max_width_inches = 6.0 * inch
+                max_height_inches = 4.5 * inch
+                
+                # Natural size in points: our own rasters are MERMAID_DPI; worker screenshots
+                # carry their resolution in a pHYs chunk
+                dpi = _png_dpi(image_data) or MERMAID_DPI
+                natural_width = original_width / dpi * inch
+                natural_height = original_height / dpi * inch
+                
+                # Fit within max dimensions without scaling up, then enlarge to the minimum
+                # readable size if that left it too small (one scale for both axes)
+                min_width = 3.0 * inch
+                min_height = 2.0 * inch
+                scale = min(max_width_inches / natural_width, max_height_inches / natural_height, 1.0)
+                scale = max(scale, min_width / natural_width, min_height / natural_height)
+                final_width = natural_width * scale
+                final_height = natural_height * scale
                 
-                logger.info(f"Final image dimensions: {final_width:.2f} x {final_height:.2f} inches")
+                logger.info(f"Final image dimensions: {final_width / inch:.2f} x {final_height / inch:.2f} inches")
         
-            except Exception as pil_error:
-                logger.warning(f"PIL image validation failed: {pil_error}, using default size")
+            except Exception as size_error:
+                logger.warning(f"Could not read image dimensions: {size_error}, using default size")
                 final_width = 5.0 * inch
                 final_height = 3.5 * inch
             
-            # Reset buffer position
-            image_buffer.seek(0)
-            
             # Create ReportLab Image object directly from BytesIO
             try:
                 img = Image(image_buffer, width=final_width, height=final_height)
                 logger.info("Successfully created ReportLab Image object")
-                
-                # Clean up the temporary file now that we have the image in memory
-                try:
-                    os.unlink(image_path)
-                except Exception:
-                    pass  # Ignore cleanup errors
-                
                 return img
                 
             except Exception as img_error:
@@ -1020,11 +1344,4 @@ class PDFGenerator:
                 
         except Exception as e:
             logger.error(f"Error processing Mermaid image: {e}")
-            return None
-        finally:
-            # Ensure cleanup happens
-            try:
-                if os.path.exists(image_path):
-                    os.unlink(image_path)
-            except Exception:
-                pass
\ No newline at end of file
+            return None
\ No newline at end of file
@@ -3,10 +3,41 @@
 Test script for SRS Agent - System Architecture Diagram Generation
 """
 
-import requests
+import asyncio
 import json
 
-def test_srs_agent():
+import httpx
+import ijson
+
+# Both tests share one client: its pooled keep-alive connections skip a new TCP handshake per request
+MAX_CONNECTIONS = 4
+KEEPALIVE_EXPIRY = 60
+
+# Response fields saved by test_srs_agent, and the file each one goes to
+SAVED_FIELDS = {
+    'architecture_diagram': 'architecture_diagram.mmd',
+    'component_summary': 'component_summary.txt',
+}
+
+class _AsyncBodyReader:
+    """Async file-like view of a streamed httpx response, for ijson's incremental parser"""
+    
+    def __init__(self, response: httpx.Response):
+        self._chunks = response.aiter_bytes()
+        self._buffer = b''
+    
+    async def read(self, size: int = -1) -> bytes:
+        # ijson calls read(0) to check the stream type, so never hand out more than size
+        if size == 0:
+            return b''
+        if not self._buffer:
+            self._buffer = await anext(self._chunks, b'')
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+async def test_srs_agent(client: httpx.AsyncClient):
     """Test the SRS agent endpoint"""
     
     # Test data
@@ -60,54 +91,57 @@ def test_srs_agent():
         print(f"📡 Sending request to: {url}")
         print(f"📋 Requirements: {test_data['requirements'][:100]}...")
         
-        # Make the request
-        response = requests.post(
+        # Stream the response: only the two fields we save are pulled out of the JSON, and each
+        # goes straight to its file instead of decoding the whole body first
+        async with client.stream(
+            'POST',
             url,
             json=test_data,
             headers={'Content-Type': 'application/json'},
             timeout=30
-        )
-        
-        print(f"📊 Response Status: {response.status_code}")
-        
-        if response.status_code == 200:
-            result = response.json()
-            print("✅ Success!")
-            print(f"🏗️  Architecture Diagram Generated: {len(result.get('architecture_diagram', ''))} characters")
-            print(f"📝 Component Summary: {len(result.get('component_summary', ''))} characters")
-            
-            # Save results to files
-            with open('architecture_diagram.mmd', 'w') as f:
-                f.write(result.get('architecture_diagram', ''))
-            print("💾 Architecture diagram saved to: architecture_diagram.mmd")
-            
-            with open('component_summary.txt', 'w') as f:
-                f.write(result.get('component_summary', ''))
-            print("💾 Component summary saved to: component_summary.txt")
-            
-            # Display a preview
-            print("\n" + "="*50)
-            print("🏗️  ARCHITECTURE DIAGRAM PREVIEW:")
-            print("="*50)
-            print(result.get('architecture_diagram', '')[:500] + "...")
+        ) as response:
+            print(f"📊 Response Status: {response.status_code}")
             
-            print("\n" + "="*50)
-            print("📝 COMPONENT SUMMARY PREVIEW:")
-            print("="*50)
-            print(result.get('component_summary', '')[:300] + "...")
+            if response.status_code == 200:
+                previews = {}
+                async for key, value in ijson.kvitems(_AsyncBodyReader(response), ''):
+                    if key in SAVED_FIELDS:
+                        with open(SAVED_FIELDS[key], 'wb', buffering=1 << 20) as f:
+                            f.write(value.encode('utf-8'))
+                        previews[key] = (len(value), value[:500])
+                
+                diagram_length, diagram_preview = previews.get('architecture_diagram', (0, ''))
+                summary_length, summary_preview = previews.get('component_summary', (0, ''))
+                print("✅ Success!")
+                print(f"🏗️  Architecture Diagram Generated: {diagram_length} characters")
+                print(f"📝 Component Summary: {summary_length} characters")
+                print(f"💾 Architecture diagram saved to: {SAVED_FIELDS['architecture_diagram']}")
+                print(f"💾 Component summary saved to: {SAVED_FIELDS['component_summary']}")
+                
+                # Display a preview
+                print("\n" + "="*50)
+                print("🏗️  ARCHITECTURE DIAGRAM PREVIEW:")
+                print("="*50)
+                print(diagram_preview + "...")
+                
+                print("\n" + "="*50)
+                print("📝 COMPONENT SUMMARY PREVIEW:")
+                print("="*50)
+                print(summary_preview[:300] + "...")
+                
+            else:
+                await response.aread()
+                print(f"❌ Error: {response.status_code}")
+                print(f"Response: {response.text}")
             
-        else:
-            print(f"❌ Error: {response.status_code}")
-            print(f"Response: {response.text}")
-            
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("❌ Connection Error: Make sure the Flask server is running on http://127.0.0.1:5000")
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         print("❌ Timeout Error: The request took too long")
     except Exception as e:
         print(f"❌ Unexpected Error: {str(e)}")
 
-def test_minimal_requirements():
+async def test_minimal_requirements(client: httpx.AsyncClient):
     """Test with minimal requirements"""
     
     minimal_data = {
@@ -120,7 +154,7 @@ def test_minimal_requirements():
     try:
         print("\n🧪 Testing with minimal requirements...")
         
-        response = requests.post(
+        response = await client.post(
             url,
             json=minimal_data,
             headers={'Content-Type': 'application/json'},
@@ -137,15 +171,17 @@ def test_minimal_requirements():
     except Exception as e:
         print(f"❌ Minimal test error: {str(e)}")
 
+async def main():
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, keepalive_expiry=KEEPALIVE_EXPIRY)
+    async with httpx.AsyncClient(limits=limits) as client:
+        # Run the full and the minimal requirements tests at the same time, overlapping the server's model calls
+        await asyncio.gather(test_srs_agent(client), test_minimal_requirements(client))
+
 if __name__ == "__main__":
     print("🔬 SRS Agent Test Suite")
     print("=" * 50)
     
-    # Test with full requirements
-    test_srs_agent()
-    
-    # Test with minimal requirements
-    test_minimal_requirements()
+    asyncio.run(main())
     
     print("\n" + "=" * 50)
     print("🏁 Test suite completed!")
@@ -2,16 +2,18 @@
 """
 Test script for mockups agent
 """
+import asyncio
 import sys
 import os
 import json
 
 # Add the backend directory to Python path
-sys.path.append('/Users/macbookair/Desktop/Hackathon/global-hackathon-v1/backend')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
 
-from agents.mockups_agent import generate_mockups_sync
+from agents.mockups_agent import generate_mockups
+from agents.result import Err
 
-def test_mockups_agent():
+async def test_mockups_agent():
     """Test the mockups agent with a simple description"""
     description = "A simple banking app with login, dashboard, and account management"
     design_preferences = "Modern, clean, blue and white theme"
@@ -24,7 +26,12 @@ def test_mockups_agent():
     print("-" * 50)
     
     try:
-        result = generate_mockups_sync(description, design_preferences, screens)
+        # The screens are generated concurrently, over the agents' shared pooled client
+        result = await generate_mockups(description, design_preferences, screens)
+        if isinstance(result, Err):
+            print(f"Error: {result.error}")
+            return
+        result = result.value
         print("Result received:")
         print(f"Type: {type(result)}")
         print(f"Keys: {result.keys() if isinstance(result, dict) else 'Not a dict'}")
@@ -58,4 +65,4 @@ def test_mockups_agent():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    test_mockups_agent()
\ No newline at end of file
+    asyncio.run(test_mockups_agent())
\ No newline at end of file